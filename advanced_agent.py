@@ -10,13 +10,15 @@ Advanced Autonomous Agent with:
 
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional
+import re
+import time
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
-import json
 
-from agent import AutonomousAgent, Task
+from agent import AutonomousAgent, Task, dumps_pretty, run_main
 from self_healing import SelfHealer
-from self_learning import SelfLearner, Experience
+from self_learning import SelfLearner, Experience, _utcnow
 from zero_reasoning import ZeroReasoner
 from tool_builder import ToolBuilder, ToolSpec
 from refactoring_loop import RefactoringLoop
@@ -26,6 +28,40 @@ from resilience import ResilienceManager
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Keywords that mark a task as needing deep reasoning (substring match)
+_COMPLEX_TASK_RE = re.compile(
+    r'analyze|design|architect|optimize|explain|reason|prove|deduce',
+    re.IGNORECASE
+)
+
+
+# Capabilities every agent has before any tools are built
+_CORE_CAPABILITIES = (
+    'web_search',
+    'code_execution',
+    'computer_control',
+    'llm_reasoning',
+)
+
+# Invariant prompt prefix shared by every reasoning call of an autonomous run
+_AUTONOMOUS_PREFIX = (
+    "You are an autonomous agent working towards this goal:\n{goal}\n\n"
+    "Reason carefully and answer only the question that follows."
+)
+
+# Phrasings used for speculative next-action rollouts in autonomous mode
+_ROLLOUT_PROMPTS = (
+    "What is the best next action to achieve: {goal}",
+    "What single concrete step makes the most progress towards: {goal}",
+    "Given the work done so far, what should be done next to achieve: {goal}",
+)
+
+
+@lru_cache(maxsize=4096)
+def _is_complex_description(description: str) -> bool:
+    """Check a task description for complexity keywords in a single pass"""
+    return _COMPLEX_TASK_RE.search(description) is not None
+
 
 class AdvancedAgent(AutonomousAgent):
     """
@@ -39,7 +75,9 @@ class AdvancedAgent(AutonomousAgent):
 
         # Initialize advanced systems
         self.healer = SelfHealer(self)
-        self.learner = SelfLearner(self)
+        self.learner = SelfLearner(
+            self, config.get('knowledge_base_path', 'knowledge_base.json')
+        )
         self.reasoner = ZeroReasoner(self)
         self.builder = ToolBuilder(self)
         self.refactorer = RefactoringLoop(self)
@@ -49,6 +87,22 @@ class AdvancedAgent(AutonomousAgent):
         # Start background monitoring
         self.monitoring_task = None
 
+        # Replay priority baseline and plans of previously solved tasks
+        self._ema_duration: Optional[float] = None
+        self.solved_plans: Dict[str, Dict] = {}
+        self.solved_plans_capacity = config.get('solved_plans_capacity', 1024)
+
+        # Speculative rollouts per autonomous iteration and LLM concurrency cap
+        self.rollouts = max(1, min(config.get('rollouts', 3), len(_ROLLOUT_PROMPTS)))
+        self._rollout_semaphore = asyncio.Semaphore(self.rollouts)
+
+        # In-flight healing attempts keyed by (error type, component)
+        self._healing_inflight: Dict[tuple, asyncio.Future] = {}
+
+        # Capabilities snapshot and the tool builder generation it reflects
+        self._capabilities: Tuple[str, ...] = _CORE_CAPABILITIES
+        self._capabilities_generation = self.builder.generation
+
         logger.info("Advanced Agent initialized with all systems")
 
     async def start(self):
@@ -69,8 +123,13 @@ class AdvancedAgent(AutonomousAgent):
         if self.monitoring_task:
             self.monitoring_task.cancel()
 
-        # Save learned knowledge
-        self.learner._save_knowledge_base()
+        await self.stop_workers()
+        self.computer.close()
+        self.refactorer.close()
+        await self.searcher.close()
+
+        # Save learned knowledge once pending log writes have landed
+        await self.learner.close()
 
         logger.info("Agent stopped")
 
@@ -79,7 +138,7 @@ class AdvancedAgent(AutonomousAgent):
         Process task with advanced capabilities
         """
         logger.info(f"Processing task {task.id} with advanced agent")
-        start_time = asyncio.get_event_loop().time()
+        start_ns = time.monotonic_ns()
 
         try:
             # Check if we need new tools for this task
@@ -98,11 +157,11 @@ class AdvancedAgent(AutonomousAgent):
                 logger.info("Applying absolute zero reasoning")
                 reasoning_result = await self.reasoner.reason_from_zero(
                     task.description,
-                    {'memory': self.memory}
+                    {'memory': self.recent_memory()}
                 )
 
                 # Use reasoning to inform task execution
-                task.metadata = {'reasoning': reasoning_result}
+                task.metadata['reasoning'] = reasoning_result
 
             # Get learned strategy suggestion
             strategy = await self.learner.suggest_strategy(
@@ -119,7 +178,7 @@ class AdvancedAgent(AutonomousAgent):
                 # Self-healing on error
                 logger.warning(f"Task execution error, attempting self-healing")
 
-                healed = await self.healer.handle_failure(
+                healed = await self._heal(
                     e,
                     'task_execution',
                     {'task': task.description}
@@ -132,14 +191,16 @@ class AdvancedAgent(AutonomousAgent):
                     raise
 
             # Record experience for learning
-            end_time = asyncio.get_event_loop().time()
-            duration = end_time - start_time
+            duration = (time.monotonic_ns() - start_ns) / 1e9
 
             experience = Experience(
-                timestamp=completed_task.timestamp if hasattr(completed_task, 'timestamp') else None,
+                timestamp=_utcnow(),
                 task_description=task.description,
                 strategy_used=strategy['strategy'],
-                actions_taken=completed_task.result if isinstance(completed_task.result, list) else [],
+                actions_taken=[
+                    {'action': step.get('action')}
+                    for step in (completed_task.plan or {}).get('steps', [])
+                ],
                 outcome='success' if completed_task.status == 'completed' else 'failure',
                 performance_metrics={
                     'duration': duration,
@@ -148,7 +209,16 @@ class AdvancedAgent(AutonomousAgent):
                 context={'task_id': task.id}
             )
 
-            await self.learner.record_experience(experience)
+            # Prioritize surprising durations and failures for replay
+            if self._ema_duration is None:
+                self._ema_duration = duration
+            priority = abs(duration - self._ema_duration) + (0.0 if experience.outcome == 'success' else 1.0)
+            self._ema_duration += 0.1 * (duration - self._ema_duration)
+
+            await self.learner.record_experience(experience, priority=priority)
+
+            if completed_task.status == 'completed' and completed_task.plan:
+                self._remember_solution(task.description, completed_task.plan)
 
             return completed_task
 
@@ -158,33 +228,73 @@ class AdvancedAgent(AutonomousAgent):
             task.status = "failed"
 
             # Try to heal and learn from failure
-            await self.healer.handle_failure(e, 'advanced_agent', {'task': task.description})
+            await self._heal(e, 'advanced_agent', {'task': task.description})
 
             return task
 
-    def _get_current_capabilities(self) -> List[str]:
-        """Get list of current agent capabilities"""
-        capabilities = [
-            'web_search',
-            'code_execution',
-            'computer_control',
-            'llm_reasoning'
-        ]
+    async def _heal(self, error: Exception, component: str, context: Dict) -> bool:
+        """
+        Run self-healing, coalescing concurrent failures of the same kind
 
-        # Add dynamically built tools
-        capabilities.extend(self.builder.built_tools.keys())
+        Args:
+            error: Exception that occurred
+            component: Component where the failure happened
+            context: Failure context
 
-        return capabilities
+        Returns:
+            Whether recovery succeeded
+        """
+        key = (type(error).__name__, component)
+        inflight = self._healing_inflight.get(key)
+        if inflight is not None:
+            logger.info(f"Joining in-flight healing for {key}")
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._healing_inflight[key] = future
+        try:
+            healed = await self.healer.handle_failure(error, component, context)
+            future.set_result(healed)
+            return healed
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unobserved failure does not log a warning
+            future.exception()
+            raise
+        finally:
+            del self._healing_inflight[key]
+
+    async def _plan_task(self, task: Task) -> Dict:
+        """Reuse the plan of a previously solved identical task, if any"""
+        plan = self.solved_plans.get(task.description)
+        if plan is not None:
+            logger.info(f"Reusing cached plan for task {task.id}")
+            return plan
+
+        return await super()._plan_task(task)
+
+    def _remember_solution(self, description: str, plan: Dict):
+        """Cache the plan of a solved task, evicting the oldest when full"""
+        self.solved_plans.pop(description, None)
+        if len(self.solved_plans) >= self.solved_plans_capacity:
+            del self.solved_plans[next(iter(self.solved_plans))]
+        self.solved_plans[description] = plan
+
+    def _get_current_capabilities(self) -> Tuple[str, ...]:
+        """Get current agent capabilities, rebuilt only after new tools are built"""
+        if self._capabilities_generation != self.builder.generation:
+            # Core capabilities followed by dynamically built tools
+            self._capabilities = _CORE_CAPABILITIES + tuple(self.builder.built_tools)
+            self._capabilities_generation = self.builder.generation
+
+        return self._capabilities
 
     def _is_complex_task(self, task: Task) -> bool:
         """Determine if task requires deep reasoning"""
-        complexity_keywords = [
-            'analyze', 'design', 'architect', 'optimize',
-            'explain', 'reason', 'prove', 'deduce'
-        ]
-
-        desc_lower = task.description.lower()
-        return any(kw in desc_lower for kw in complexity_keywords)
+        return _is_complex_description(task.description)
 
     async def run_autonomous(self, goal: str, max_iterations: int = 20):
         """
@@ -192,14 +302,18 @@ class AdvancedAgent(AutonomousAgent):
         """
         logger.info(f"Starting autonomous mode (advanced) with goal: {goal}")
 
+        prefix = _AUTONOMOUS_PREFIX.format(goal=goal)
+        rollout_cache: Dict[tuple, Dict] = {}
         iteration = 0
         while iteration < max_iterations:
             try:
-                # Use zero reasoning to determine next action
-                reasoning = await self.reasoner.reason_from_zero(
-                    f"What is the best next action to achieve: {goal}",
-                    {'memory': self.memory, 'iteration': iteration}
-                )
+                # Use zero reasoning to determine next action, reusing the
+                # previous rollout when nothing has changed since
+                key = (goal, self.memory_digest())
+                reasoning = rollout_cache.get(key)
+                if reasoning is None:
+                    reasoning = await self._speculate_next_action(goal, iteration, prefix)
+                    rollout_cache[key] = reasoning
 
                 next_action = {
                     'action': reasoning['solution'][:100],  # Simplified
@@ -229,7 +343,7 @@ class AdvancedAgent(AutonomousAgent):
                 logger.error(f"Autonomous iteration error: {e}")
 
                 # Self-heal and continue
-                healed = await self.healer.handle_failure(
+                healed = await self._heal(
                     e,
                     'autonomous_mode',
                     {'goal': goal, 'iteration': iteration}
@@ -247,6 +361,37 @@ class AdvancedAgent(AutonomousAgent):
             'iterations': iteration
         }
 
+    async def _speculate_next_action(self, goal: str, iteration: int,
+                                     prefix: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Reason about the next action along several phrasings concurrently
+
+        Args:
+            goal: Goal being pursued
+            iteration: Current autonomous iteration
+            prefix: Invariant prompt prefix shared across iterations
+
+        Returns:
+            The highest-confidence reasoning result
+        """
+        context = {'memory': self.recent_memory(), 'iteration': iteration}
+
+        async def rollout(prompt: str) -> Dict[str, Any]:
+            async with self._rollout_semaphore:
+                return await self.reasoner.reason_from_zero(
+                    prompt.format(goal=goal), context, prefix=prefix
+                )
+
+        results = await asyncio.gather(
+            *(rollout(prompt) for prompt in _ROLLOUT_PROMPTS[:self.rollouts]),
+            return_exceptions=True
+        )
+        candidates = [r for r in results if not isinstance(r, BaseException)]
+        if not candidates:
+            raise results[0]
+
+        return max(candidates, key=lambda r: r['confidence'])
+
     async def self_improve(self):
         """Trigger comprehensive self-improvement cycle"""
         logger.info("Starting comprehensive self-improvement cycle")
@@ -258,7 +403,7 @@ class AdvancedAgent(AutonomousAgent):
             'recommendations': None
         }
 
-        # 1. Analyze and refactor codebase
+        # Codebase files to analyze and refactor
         code_files = [
             'agent.py',
             'advanced_agent.py',
@@ -268,54 +413,79 @@ class AdvancedAgent(AutonomousAgent):
             'web_search.py'
         ]
 
-        analysis = await self.refactorer.analyze_codebase(code_files)
+        # Strategy optimization is pure computation and runs inline
+        try:
+            optimized = self.learner._optimize_strategies(self.learner.replay.sample(256))
+        except Exception as e:
+            optimized = e
+
+        # The analysis, learning and prediction phases are independent of
+        # each other, so run them concurrently
+        analysis, gaps, recommendations, predictions = await asyncio.gather(
+            self.refactorer.analyze_codebase(code_files),
+            self.learner.identify_knowledge_gaps(),
+            self.learner.recommend_improvements(),
+            self.healer.predict_failures(),
+            return_exceptions=True
+        )
+
+        analysis = self._phase_result(
+            'code_analysis', analysis,
+            {'files_analyzed': 0, 'issues_found': [], 'suggestions': [], 'metrics': {}}
+        )
+        gaps = self._phase_result('knowledge_gaps', gaps, [])
+        recommendations = self._phase_result('recommendations', recommendations, [])
+        predictions = self._phase_result('failure_prediction', predictions, [])
+        self._phase_result('strategy_optimization', optimized, None)
+
         logger.info(f"Code analysis complete: {len(analysis['issues_found'])} issues found")
 
-        # Apply refactoring to files with issues
-        refactored_files = []
-        for filepath, metrics in analysis['metrics'].items():
-            if any(issue['severity'] == 'high' for issue in analysis['issues_found']):
-                logger.info(f"Auto-refactoring {filepath}")
-                result = await self.refactorer.auto_refactor(filepath, backup=True)
-                if result:
-                    refactored_files.append(filepath)
-        
+        # Apply refactoring only to files with high-severity issues
+        files_to_refactor = list(dict.fromkeys(
+            issue['filepath'] for issue in analysis['issues_found']
+            if issue['severity'] == 'high'
+        ))
+        results = await asyncio.gather(*(
+            self.refactorer.auto_refactor(filepath, backup=True)
+            for filepath in files_to_refactor
+        ))
+        refactored_files = [
+            filepath for filepath, result in zip(files_to_refactor, results) if result
+        ]
+
         improvements['code_refactoring'] = {
             'analysis': analysis,
             'refactored_files': refactored_files,
             'total_refactorings': len(self.refactorer.refactoring_history)
         }
 
-        # 2. Identify knowledge gaps
-        gaps = await self.learner.identify_knowledge_gaps()
         improvements['knowledge_gaps'] = gaps
         logger.info(f"Identified {len(gaps)} knowledge gaps")
 
-        # 3. Get learning recommendations
-        recommendations = await self.learner.recommend_improvements()
         improvements['recommendations'] = recommendations
         logger.info(f"Generated {len(recommendations)} improvement recommendations")
 
-        # 4. Predict and prevent failures
-        predictions = await self.healer.predict_failures()
         improvements['healing_optimizations'] = {
             'predicted_failures': predictions,
             'preventive_actions': [p['recommended_action'] for p in predictions]
         }
         logger.info(f"Predicted {len(predictions)} potential failures")
 
-        # 5. Optimize strategy selection based on data
-        await self.learner._optimize_strategies()
-        
         logger.info("Self-improvement cycle complete")
         return improvements
     
+    def _phase_result(self, phase: str, result: Any, default: Any) -> Any:
+        """Unwrap a gathered self-improvement phase, logging failures"""
+        if isinstance(result, Exception):
+            logger.error(f"Self-improvement phase '{phase}' failed: {result}")
+            return default
+        return result
+
     async def continuous_evolution(self, duration_hours: int = 24):
         """Run continuous evolution loop for specified duration"""
         logger.info(f"Starting continuous evolution for {duration_hours} hours")
         
-        import time
-        start_time = time.time()
+        start_time = time.monotonic()
         end_time = start_time + (duration_hours * 3600)
         
         evolution_metrics = {
@@ -325,16 +495,24 @@ class AdvancedAgent(AutonomousAgent):
             'new_knowledge': 0
         }
         
-        while time.time() < end_time:
+        while (now := time.monotonic()) < end_time:
             try:
                 # Periodic self-improvement (every 2 hours)
-                if int((time.time() - start_time) / 7200) > evolution_metrics['improvements_made']:
+                improvement_due = start_time + (evolution_metrics['improvements_made'] + 1) * 7200
+                if now >= improvement_due:
                     logger.info("Triggering periodic self-improvement")
                     await self.self_improve()
                     evolution_metrics['improvements_made'] += 1
-                
-                # Monitor and optimize
-                await asyncio.sleep(300)  # Check every 5 minutes
+                    improvement_due += 7200
+                    now = time.monotonic()
+
+                # Wake on a threshold alert, else check every 5 minutes at most
+                timeout = max(0.0, min(300, improvement_due - now, end_time - now))
+                try:
+                    await asyncio.wait_for(self.metrics.threshold_crossed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self.metrics.threshold_crossed.clear()
                 
                 # Check for predicted failures and take preventive action
                 predictions = await self.healer.predict_failures()
@@ -344,7 +522,7 @@ class AdvancedAgent(AutonomousAgent):
                 
             except Exception as e:
                 logger.error(f"Evolution cycle error: {e}")
-                await self.healer.handle_failure(e, 'evolution', {})
+                await self._heal(e, 'evolution', {})
         
         logger.info(f"Evolution complete. Metrics: {evolution_metrics}")
         return evolution_metrics
@@ -390,7 +568,7 @@ class AdvancedAgent(AutonomousAgent):
             },
             'performance': {
                 'memory_size': len(self.memory),
-                'task_queue_size': len(self.task_queue),
+                'task_queue_size': self.task_queue.qsize(),
                 'strategy_performance': learning_report['strategy_performance']
             },
             'active_alerts': metrics_report['active_alerts']
@@ -425,22 +603,22 @@ async def main():
         result = await agent.run(
             "Research quantum computing and create a technical analysis"
         )
-        print("Task result:", json.dumps(result, indent=2))
+        print("Task result:", dumps_pretty(result))
 
         # Example 2: Autonomous mode
         autonomous_result = await agent.run_autonomous(
             goal="Become expert at analyzing AI research papers",
             max_iterations=10
         )
-        print("Autonomous result:", json.dumps(autonomous_result, indent=2))
+        print("Autonomous result:", dumps_pretty(autonomous_result))
 
         # Example 3: Self-improvement
         improvement = await agent.self_improve()
-        print("Self-improvement:", json.dumps(improvement, indent=2))
+        print("Self-improvement:", dumps_pretty(improvement))
 
         # Get status report
         status = agent.get_status_report()
-        print("Agent status:", json.dumps(status, indent=2))
+        print("Agent status:", dumps_pretty(status))
 
     finally:
         # Stop agent gracefully
@@ -448,4 +626,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_main(main())
@@ -5,21 +5,34 @@ A general-purpose AI agent with computer control, web search, and code execution
 """
 
 import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from typing import Awaitable, Dict, List, Any, Optional
+from dataclasses import dataclass, field
+from collections import deque
+from itertools import count, islice
 import json
 
 from computer_control import ComputerController
 from web_search import WebSearcher
 from code_executor import CodeExecutor
-from llm_interface import LLMInterface
+from llm_interface import AsyncBatcher, LLMInterface
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     """Represents a task for the agent to complete"""
     id: str
@@ -28,6 +41,8 @@ class Task:
     status: str = "pending"
     result: Optional[Any] = None
     error: Optional[str] = None
+    plan: Optional[Dict] = None
+    metadata: Dict = field(default_factory=dict)
 
 
 class AutonomousAgent:
@@ -47,8 +62,32 @@ class AutonomousAgent:
         self.computer = ComputerController(config.get('computer_config', {}))
         self.searcher = WebSearcher(config.get('search_config', {}))
         self.executor = CodeExecutor(config.get('executor_config', {}))
-        self.task_queue: List[Task] = []
-        self.memory: List[Dict] = []
+
+        # Pending tasks ordered by priority, drained by a pool of workers
+        self.task_queue: asyncio.PriorityQueue = asyncio.PriorityQueue(
+            maxsize=config.get('queue_max', 1024)
+        )
+        self.max_workers = config.get('max_workers', 1)
+        self._workers: List[asyncio.Task] = []
+        self._task_counter = count()
+
+        # Bounded step memory plus an index of entries per task
+        self.memory: deque = deque(maxlen=config.get('memory_capacity', 10000))
+        self.memory_index: Dict[str, List[Dict]] = {}
+
+        # Per-entry hashes XOR-folded into a digest of the whole memory
+        self._memory_hashes: deque = deque(maxlen=self.memory.maxlen)
+        self._memory_digest = 0
+        self._memory_seq = count()
+
+        # Plans for tasks submitted close together are requested in one LLM call.
+        # A single worker never has another plan request pending, so by default
+        # it only waits for requests made in the same event loop iteration.
+        self._plan_batcher = AsyncBatcher(
+            self._plan_batch,
+            max_batch=config.get('plan_batch_size', 8),
+            max_wait_ms=config.get('plan_batch_wait_ms', 20 if self.max_workers > 1 else 0)
+        )
 
         logger.info("Autonomous Agent initialized successfully")
 
@@ -66,7 +105,8 @@ class AutonomousAgent:
 
         try:
             # Use LLM to determine which capabilities to use
-            plan = await self.llm.create_plan(task.description, self.memory)
+            plan = await self._plan_task(task)
+            task.plan = plan
             logger.info(f"Execution plan created: {plan['steps']}")
 
             results = []
@@ -75,11 +115,7 @@ class AutonomousAgent:
                 results.append(step_result)
 
                 # Update memory with step results
-                self.memory.append({
-                    'task_id': task.id,
-                    'step': step,
-                    'result': step_result
-                })
+                self._remember(task.id, step, step_result)
 
             task.result = results
             task.status = "completed"
@@ -92,6 +128,109 @@ class AutonomousAgent:
 
         return task
 
+    async def _plan_task(self, task: Task) -> Dict:
+        """
+        Create an execution plan for a task
+
+        Args:
+            task: Task to plan
+
+        Returns:
+            Execution plan dictionary
+        """
+        return await self._plan_batcher.submit(
+            (task.description, self.recent_memory(), self.memory_digest())
+        )
+
+    async def _plan_batch(self, requests: List[tuple]) -> List[Dict]:
+        """Plan a batch of (description, memory, memory digest) requests"""
+        return await self.llm.create_plans_batch(requests)
+
+    def _remember(self, task_id: str, step: Dict, result: Any):
+        """
+        Append a step result to memory and keep the task index in sync
+
+        Args:
+            task_id: ID of the task the step belongs to
+            step: Executed step dictionary
+            result: Result of the step
+        """
+        if len(self.memory) == self.memory.maxlen:
+            # The oldest entry is about to be evicted from the ring buffer
+            evicted = self.memory[0]
+            self._memory_digest ^= self._memory_hashes[0]
+            entries = self.memory_index.get(evicted['task_id'])
+            if entries:
+                entries.pop(0)
+                if not entries:
+                    del self.memory_index[evicted['task_id']]
+
+        entry = {
+            'task_id': task_id,
+            'step': step,
+            'result': result
+        }
+        self.memory.append(entry)
+        self.memory_index.setdefault(task_id, []).append(entry)
+
+        # Salt with a sequence number so identical entries do not cancel out
+        if orjson is not None:
+            payload = orjson.dumps(
+                entry, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str
+            )
+        else:
+            payload = json.dumps(entry, sort_keys=True, default=str).encode()
+        entry_hash = int.from_bytes(
+            hashlib.blake2b(b"%d:%s" % (next(self._memory_seq), payload), digest_size=8).digest(),
+            'little'
+        )
+        self._memory_hashes.append(entry_hash)
+        self._memory_digest ^= entry_hash
+
+    def recent_memory(self, n: int = 10) -> List[Dict]:
+        """
+        Get the most recent memory entries
+
+        Args:
+            n: Maximum number of entries to return
+
+        Returns:
+            List of the last n memory entries, oldest first
+        """
+        return list(islice(self.memory, max(0, len(self.memory) - n), None))
+
+    def memory_digest(self) -> int:
+        """
+        Get a digest of the current memory contents
+
+        Returns:
+            Integer that changes whenever an entry is added or evicted
+        """
+        return self._memory_digest
+
+    def task_memory(self, task_id: str) -> List[Dict]:
+        """Get all remembered steps for a task"""
+        return list(self.memory_index.get(task_id, []))
+
+    def trim_memory(self, keep: int):
+        """
+        Drop all but the most recent memory entries
+
+        Args:
+            keep: Number of entries to keep
+        """
+        recent = self.recent_memory(keep)
+        hashes = list(islice(self._memory_hashes, len(self._memory_hashes) - len(recent), None))
+        self.memory.clear()
+        self.memory_index.clear()
+        self._memory_hashes.clear()
+        self._memory_digest = 0
+        for entry, entry_hash in zip(recent, hashes):
+            self.memory.append(entry)
+            self.memory_index.setdefault(entry['task_id'], []).append(entry)
+            self._memory_hashes.append(entry_hash)
+            self._memory_digest ^= entry_hash
+
     async def _execute_step(self, step: Dict) -> Any:
         """
         Execute a single step using the appropriate capability
@@ -120,23 +259,58 @@ class AutonomousAgent:
         else:
             raise ValueError(f"Unknown action type: {action}")
 
-    async def run(self, task_description: str) -> Dict[str, Any]:
+    async def _worker(self):
+        """Process queued tasks in priority order until cancelled"""
+        while True:
+            _, _, task, future = await self.task_queue.get()
+            try:
+                completed_task = await self.process_task(task)
+                if not future.done():
+                    future.set_result(completed_task)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.task_queue.task_done()
+
+    def _ensure_workers(self):
+        """Start queue workers up to the configured pool size"""
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.max_workers:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def stop_workers(self):
+        """Cancel all queue workers and wait for them to exit"""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def run(self, task_description: str, priority: int = 1) -> Dict[str, Any]:
         """
         Main entry point to run the agent with a task
 
         Args:
             task_description: Natural language description of the task
+            priority: Higher priority tasks are processed first
 
         Returns:
             Task results dictionary
         """
+        seq = next(self._task_counter)
         task = Task(
-            id=f"task_{len(self.task_queue)}",
-            description=task_description
+            id=f"task_{seq}",
+            description=task_description,
+            priority=priority
         )
 
-        self.task_queue.append(task)
-        completed_task = await self.process_task(task)
+        self._ensure_workers()
+        future = asyncio.get_running_loop().create_future()
+        await self.task_queue.put((-task.priority, seq, task, future))
+        completed_task = await future
 
         return {
             'task_id': completed_task.id,
@@ -158,7 +332,7 @@ class AutonomousAgent:
         iteration = 0
         while iteration < max_iterations:
             # Ask LLM for next action based on goal and memory
-            next_action = await self.llm.determine_next_action(goal, self.memory)
+            next_action = await self.llm.determine_next_action(goal, self.recent_memory())
 
             if next_action['action'] == 'goal_achieved':
                 logger.info(f"Goal achieved in {iteration} iterations")
@@ -185,6 +359,30 @@ class AutonomousAgent:
         }
 
 
+def dumps_pretty(obj: Any) -> str:
+    """Render an object as indented JSON, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+            default=str
+        ).decode()
+    return json.dumps(obj, indent=2, default=str)
+
+
+def run_main(main: Awaitable) -> Any:
+    """Run an entry-point coroutine, on uvloop when it is installed"""
+    async def bootstrap():
+        # Let tasks that finish without suspending run inline (Python 3.12+)
+        if hasattr(asyncio, 'eager_task_factory'):
+            asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+        return await main
+
+    if uvloop is not None:
+        return uvloop.run(bootstrap())
+    return asyncio.run(bootstrap())
+
+
 async def main():
     """Example usage of the autonomous agent"""
     config = {
@@ -207,8 +405,8 @@ async def main():
 
     # Example task
     result = await agent.run("Search for the latest AI news and summarize the top 3 articles")
-    print(json.dumps(result, indent=2))
+    print(dumps_pretty(result))
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_main(main())
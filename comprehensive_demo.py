@@ -5,19 +5,88 @@ Demonstrates all revolutionary features in action
 """
 
 import asyncio
-import json
+import io
 import logging
-from datetime import datetime
+import logging.handlers
+import os
+import queue
+import sys
+import tempfile
+from contextvars import ContextVar
+from typing import Optional
 
 from advanced_agent import AdvancedAgent
+from agent import dumps_pretty, run_main
 
-# Configure logging
+# Configure logging; records are queued and written to stderr by a listener
+# thread so the event loop never blocks on the stream
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.handlers.QueueHandler(_log_queue)],
+    force=True
 )
 logger = logging.getLogger(__name__)
 
+# Agent configurations shared by the demos
+_FULL_CONFIG = {
+    'llm_config': {'model': 'gpt-4', 'temperature': 0.7},
+    'search_config': {'engine': 'duckduckgo'},
+    'executor_config': {'safe_mode': True}
+}
+_SEARCH_CONFIG = {
+    'llm_config': {'model': 'gpt-4'},
+    'search_config': {'engine': 'duckduckgo'}
+}
+_LLM_ONLY_CONFIG = {'llm_config': {'model': 'gpt-4'}}
+
+
+def _agent_config(base: dict) -> dict:
+    """
+    Copy a shared config for one agent; self-healing may adjust component settings
+
+    The agent gets a knowledge base in the current demo's own directory, so
+    demos running side by side never write to the same snapshot or log.
+    """
+    config = {key: dict(value) for key, value in base.items()}
+    demo_dir = _demo_dir.get()
+    if demo_dir is not None:
+        config['knowledge_base_path'] = os.path.join(demo_dir, 'knowledge_base.json')
+    return config
+
+
+# Output buffer and scratch directory of the demo running in the current task, if any
+_demo_output: ContextVar[Optional[io.StringIO]] = ContextVar('demo_output', default=None)
+_demo_dir: ContextVar[Optional[str]] = ContextVar('demo_dir', default=None)
+
+
+class _DemoStdout:
+    """Stdout proxy that routes prints into the current demo's buffer"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        return (_demo_output.get() or self.stream).write(text)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+async def _run_demo(name: str, demo_func) -> str:
+    """Run one demo, capturing its output so concurrent demos don't interleave"""
+    buffer = io.StringIO()
+    _demo_output.set(buffer)
+    with tempfile.TemporaryDirectory(prefix='agent_demo_') as demo_dir:
+        _demo_dir.set(demo_dir)
+        try:
+            await demo_func()
+        except Exception:
+            logger.exception(f"Error in {name} demo")
+    return buffer.getvalue()
+
 
 async def demo_self_healing():
     """Demonstrate self-healing capabilities"""
@@ -25,20 +94,14 @@ async def demo_self_healing():
     print("DEMO 1: SELF-HEALING - Automatic Error Recovery")
     print("="*80 + "\n")
     
-    config = {
-        'llm_config': {'model': 'gpt-4', 'temperature': 0.7},
-        'search_config': {'engine': 'duckduckgo'},
-        'executor_config': {'safe_mode': True}
-    }
-    
-    agent = AdvancedAgent(config)
+    agent = AdvancedAgent(_agent_config(_FULL_CONFIG))
     await agent.start()
     
     try:
         # Simulate various failures and watch self-healing in action
         print("📊 Initial health status:")
         health = agent.healer.get_health_report()
-        print(json.dumps(health, indent=2))
+        print(dumps_pretty(health))
         
         # Simulate a failure
         print("\n🔴 Simulating API failure...")
@@ -72,23 +135,18 @@ async def demo_self_learning():
     print("DEMO 2: SELF-LEARNING - Continuous Improvement from Experience")
     print("="*80 + "\n")
     
-    config = {
-        'llm_config': {'model': 'gpt-4'},
-        'search_config': {'engine': 'duckduckgo'}
-    }
-    
-    agent = AdvancedAgent(config)
+    agent = AdvancedAgent(_agent_config(_SEARCH_CONFIG))
     await agent.start()
     
     try:
         # Record some experiences
         print("📝 Recording learning experiences...")
         
-        from self_learning import Experience
+        from self_learning import Experience, _utcnow
         
         experiences = [
             Experience(
-                timestamp=datetime.utcnow(),
+                timestamp=_utcnow(),
                 task_description="Search for AI news",
                 strategy_used="search_first",
                 actions_taken=[{'action': 'web_search', 'query': 'AI news'}],
@@ -97,7 +155,7 @@ async def demo_self_learning():
                 context={'task_type': 'search'}
             ),
             Experience(
-                timestamp=datetime.utcnow(),
+                timestamp=_utcnow(),
                 task_description="Execute Python code",
                 strategy_used="code_execution",
                 actions_taken=[{'action': 'run_code', 'language': 'python'}],
@@ -106,7 +164,7 @@ async def demo_self_learning():
                 context={'task_type': 'code'}
             ),
             Experience(
-                timestamp=datetime.utcnow(),
+                timestamp=_utcnow(),
                 task_description="Complex analysis task",
                 strategy_used="decompose_and_conquer",
                 actions_taken=[{'action': 'analyze'}, {'action': 'synthesize'}],
@@ -116,13 +174,12 @@ async def demo_self_learning():
             )
         ]
         
-        for exp in experiences:
-            await agent.learner.record_experience(exp)
+        await asyncio.gather(*(agent.learner.record_experience(exp) for exp in experiences))
         
         # Get learning report
         print("\n📊 Learning progress report:")
         report = agent.learner.get_learning_report()
-        print(json.dumps(report, indent=2))
+        print(dumps_pretty(report))
         
         # Test adaptive learning
         print("\n🎯 Adaptive learning rate:")
@@ -153,9 +210,7 @@ async def demo_zero_reasoning():
     print("DEMO 3: FIRST-PRINCIPLES REASONING - Deep Problem Analysis")
     print("="*80 + "\n")
     
-    config = {'llm_config': {'model': 'gpt-4'}}
-    
-    agent = AdvancedAgent(config)
+    agent = AdvancedAgent(_agent_config(_LLM_ONLY_CONFIG))
     await agent.start()
     
     try:
@@ -183,10 +238,8 @@ async def demo_resilience():
     print("DEMO 4: RESILIENCE - Fault Tolerance & Circuit Breakers")
     print("="*80 + "\n")
     
-    config = {'llm_config': {'model': 'gpt-4'}}
-    
-    agent = AdvancedAgent(config)
-    await agent.stop()
+    agent = AdvancedAgent(_agent_config(_LLM_ONLY_CONFIG))
+    await agent.start()
     
     try:
         print("🛡️ Resilience patterns initialized:")
@@ -216,19 +269,19 @@ async def demo_metrics():
     print("DEMO 5: ADVANCED METRICS - Performance Monitoring & Analysis")
     print("="*80 + "\n")
     
-    config = {'llm_config': {'model': 'gpt-4'}}
-    
-    agent = AdvancedAgent(config)
+    agent = AdvancedAgent(_agent_config(_LLM_ONLY_CONFIG))
     await agent.start()
     
     try:
         # Record some metrics
         print("📈 Recording performance metrics...")
-        agent.metrics.record_metric('task_duration', 2.5, unit='seconds')
-        agent.metrics.record_metric('task_duration', 1.8, unit='seconds')
-        agent.metrics.record_metric('task_duration', 3.2, unit='seconds')
-        agent.metrics.record_metric('memory_usage', 65.0, unit='percent')
-        agent.metrics.record_metric('memory_usage', 70.0, unit='percent')
+        agent.metrics.record_metrics([
+            ('task_duration', 2.5, 'seconds'),
+            ('task_duration', 1.8, 'seconds'),
+            ('task_duration', 3.2, 'seconds'),
+            ('memory_usage', 65.0, 'percent'),
+            ('memory_usage', 70.0, 'percent'),
+        ])
         
         # Establish baselines
         print("\n📊 Establishing performance baselines...")
@@ -261,13 +314,7 @@ async def demo_full_integration():
     print("DEMO 6: FULL INTEGRATION - All Systems Working Together")
     print("="*80 + "\n")
     
-    config = {
-        'llm_config': {'model': 'gpt-4', 'temperature': 0.7},
-        'search_config': {'engine': 'duckduckgo'},
-        'executor_config': {'safe_mode': True}
-    }
-    
-    agent = AdvancedAgent(config)
+    agent = AdvancedAgent(_agent_config(_FULL_CONFIG))
     await agent.start()
     
     try:
@@ -303,6 +350,15 @@ async def demo_full_integration():
 
 async def main():
     """Run all demos"""
+    _log_listener.start()
+    try:
+        await _run_all_demos()
+    finally:
+        _log_listener.stop()
+
+
+async def _run_all_demos():
+    """Run the demos concurrently and print their output in order"""
     print("\n" + "="*80)
     print(" "*20 + "ADVANCED AI AGENT - COMPREHENSIVE DEMO")
     print(" "*15 + "Demonstrating Revolutionary Capabilities")
@@ -317,14 +373,17 @@ async def main():
         ("Full Integration", demo_full_integration)
     ]
     
-    for i, (name, demo_func) in enumerate(demos, 1):
-        try:
-            await demo_func()
-            await asyncio.sleep(1)  # Brief pause between demos
-        except Exception as e:
-            logger.error(f"Error in {name} demo: {e}")
-            import traceback
-            traceback.print_exc()
+    # Demos use separate agents and knowledge bases, so run them side by side
+    # and print in order
+    stdout = sys.stdout
+    sys.stdout = _DemoStdout(stdout)
+    try:
+        outputs = await asyncio.gather(*(_run_demo(name, demo_func) for name, demo_func in demos))
+    finally:
+        sys.stdout = stdout
+
+    for output in outputs:
+        print(output, end='')
     
     print("\n" + "="*80)
     print(" "*25 + "ALL DEMOS COMPLETE!")
@@ -333,4 +392,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_main(main())
@@ -3,16 +3,81 @@ Computer Control Module
 Provides capabilities to control mouse, keyboard, screen capture, and system operations
 """
 
+import asyncio
+import contextvars
+import functools
 import pyautogui
-import subprocess
 import platform
 import logging
-from typing import Dict, Any, List, Tuple
+import os
+import shlex
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 from PIL import Image
 import io
 
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+try:
+    import mss
+    import mss.tools
+except ImportError:
+    mss = None
+
+try:
+    import pyperclip
+except ImportError:
+    pyperclip = None
+
 logger = logging.getLogger(__name__)
 
+# Texts longer than this are pasted from the clipboard rather than typed
+PASTE_THRESHOLD = 32
+
+# Seconds a mouse position reading is reused for
+MOUSE_POSITION_TTL = 0.01
+
+
+async def _fast_to_thread(func, /, *args, **kwargs):
+    """
+    asyncio.to_thread that skips the context trampoline when no context
+    variables are set, which is the common case for input and capture calls
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    if not ctx:
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+    return await loop.run_in_executor(None, functools.partial(ctx.run, func, *args, **kwargs))
+
+
+def _normalize_region(region) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Coerce a screen region to an (x, y, width, height) tuple of ints
+
+    Args:
+        region: Region as any 4-item sequence of numbers, or None for the full screen
+
+    Returns:
+        Integer region tuple, or None
+
+    Raises:
+        ValueError: If the region does not have exactly four numeric items
+    """
+    if not region:
+        return None
+    try:
+        x, y, width, height = (int(v) for v in region)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Region must be four numbers (x, y, width, height), got {region!r}") from e
+    return x, y, width, height
+
 
 class ComputerController:
     """Handles all computer control operations"""
@@ -26,11 +91,54 @@ class ComputerController:
         """
         self.config = config
         self.allowed_actions = config.get('allowed_actions', ['screenshot'])
+        self._allowed_set = frozenset(self.allowed_actions)
         self.safe_mode = config.get('safe_mode', True)
 
-        # Set up PyAutoGUI safety features
+        # Mouse and keyboard input is serialized so actions never interleave
+        self._input_lock = asyncio.Lock()
+
+        # Grayscale templates for find_on_screen by path: (mtime, pixels)
+        self._tpl_cache: Dict[str, Tuple[float, Any]] = {}
+
+        # Per-thread mss capture handles; they must not be shared across threads.
+        # Each is opened once and kept until close()
+        self._mss_local = threading.local()
+        self._mss_handles: List[Any] = []
+
+        # Recent screenshots by region: (capture time, file path)
+        self._shot_cache: Dict[Any, Tuple[float, str]] = {}
+        self._shot_ttl = config.get('screenshot_ttl', 0.1)
+
+        # Display queries: screen size until reset, mouse position briefly
+        self._screen_size = None
+        self._mouse_position = None
+        self._mouse_time = float('-inf')
+
+        # Action type -> handler taking the action parameters
+        self._dispatch = {
+            'screenshot': lambda params: (
+                self.take_screenshot_bytes(params.get('region'), params.get('format', 'PNG'))
+                if params.get('in_memory', False) else self.take_screenshot(params.get('region'))
+            ),
+            'mouse_move': lambda params: self.mouse_move(params['x'], params['y']),
+            'mouse_click': lambda params: self.mouse_click(params.get('button', 'left')),
+            'keyboard_type': lambda params: self.keyboard_type(params['text'], mode=params.get('mode', 'auto')),
+            'keyboard_press': lambda params: self.keyboard_press(params['key']),
+            # Planned commands may use pipes, redirection or globbing, so they keep shell semantics
+            'run_command': lambda params: self.run_command(params['command'], shell=params.get('shell', True)),
+            'find_on_screen': lambda params: self.find_on_screen(params['image_path']),
+        }
+
+        # Handlers for permitted actions only, so dispatch is a single lookup
+        self._allowed_dispatch = {
+            action: handler for action, handler in self._dispatch.items()
+            if action in self._allowed_set
+        }
+
+        # Set up PyAutoGUI safety features. No pause after each call by default;
+        # callers that want human-like timing pass duration/interval explicitly
         pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.5
+        pyautogui.PAUSE = config.get('pyautogui_pause', 0.0)
 
         logger.info(f"Computer Controller initialized with actions: {self.allowed_actions}")
 
@@ -45,55 +153,104 @@ class ComputerController:
         Returns:
             Result of the action
         """
-        if action_type not in self.allowed_actions:
-            raise PermissionError(f"Action {action_type} not allowed")
+        handler = self._allowed_dispatch.get(action_type)
+        if handler is None:
+            if action_type not in self._allowed_set:
+                raise PermissionError(f"Action {action_type} not allowed")
+            raise ValueError(f"Unknown action type: {action_type}")
 
-        if action_type == 'screenshot':
-            return await self.take_screenshot(params.get('region'))
+        return await handler(params)
 
-        elif action_type == 'mouse_move':
-            return await self.mouse_move(params['x'], params['y'])
+    async def _send_input(self, func, *args, **kwargs):
+        """Run a blocking PyAutoGUI input call in a worker thread, one at a time"""
+        async with self._input_lock:
+            return await _fast_to_thread(func, *args, **kwargs)
 
-        elif action_type == 'mouse_click':
-            return await self.mouse_click(params.get('button', 'left'))
+    async def take_screenshot(self, region: Tuple[int, int, int, int] = None) -> str:
+        """
+        Take a screenshot of the screen or a region
 
-        elif action_type == 'keyboard_type':
-            return await self.keyboard_type(params['text'])
+        Args:
+            region: Optional (x, y, width, height) tuple
 
-        elif action_type == 'keyboard_press':
-            return await self.keyboard_press(params['key'])
+        Returns:
+            Path to saved screenshot
+        """
+        logger.info(f"Taking screenshot, region: {region}")
+        region = _normalize_region(region)
 
-        elif action_type == 'run_command':
-            return await self.run_command(params['command'])
+        # Reuse a capture of the same region taken within the TTL
+        key = region or 'full'
+        cached = self._shot_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self._shot_ttl:
+            return cached[1]
 
-        elif action_type == 'find_on_screen':
-            return await self.find_on_screen(params['image_path'])
+        # Save screenshot under a name derived from the region, stable across runs
+        tag = zlib.crc32(struct.pack('4i', *region)) if region else 0
+        filepath = f'/tmp/screenshot_{tag:08x}.png'
 
+        if mss is not None:
+            await _fast_to_thread(self._grab_to_file, region, filepath)
         else:
-            raise ValueError(f"Unknown action type: {action_type}")
+            if region:
+                screenshot = await _fast_to_thread(pyautogui.screenshot, region=region)
+            else:
+                screenshot = await _fast_to_thread(pyautogui.screenshot)
+            await _fast_to_thread(screenshot.save, filepath)
 
-    async def take_screenshot(self, region: Tuple[int, int, int, int] = None) -> str:
+        self._shot_cache[key] = (time.monotonic(), filepath)
+        return filepath
+
+    async def take_screenshot_bytes(self, region: Tuple[int, int, int, int] = None,
+                                    fmt: str = 'PNG') -> bytes:
         """
-        Take a screenshot of the screen or a region
+        Take a screenshot and return the encoded image without touching disk
 
         Args:
             region: Optional (x, y, width, height) tuple
+            fmt: Image format understood by Pillow
 
         Returns:
-            Path to saved screenshot
+            Encoded image bytes
         """
-        logger.info(f"Taking screenshot, region: {region}")
+        logger.info(f"Taking in-memory screenshot, region: {region}")
+        region = _normalize_region(region)
+        return await _fast_to_thread(self._capture_bytes, region, fmt)
+
+    def _capture_bytes(self, region: Tuple[int, int, int, int], fmt: str) -> bytes:
+        """Capture the screen and encode it in a worker thread"""
+        if mss is not None:
+            raw = self._grab(region)
+            if fmt.upper() == 'PNG':
+                return mss.tools.to_png(raw.rgb, raw.size)
+            image = Image.frombytes('RGB', raw.size, raw.rgb)
+        elif region:
+            image = pyautogui.screenshot(region=region)
+        else:
+            image = pyautogui.screenshot()
+
+        buffer = io.BytesIO()
+        image.save(buffer, fmt)
+        return buffer.getvalue()
+
+    def _grab(self, region: Tuple[int, int, int, int] = None):
+        """Capture the screen or a region with this thread's mss handle"""
+        sct = getattr(self._mss_local, 'sct', None)
+        if sct is None:
+            sct = self._mss_local.sct = mss.mss()
+            self._mss_handles.append(sct)
 
         if region:
-            screenshot = pyautogui.screenshot(region=region)
+            left, top, width, height = region
+            monitor = {'left': left, 'top': top, 'width': width, 'height': height}
         else:
-            screenshot = pyautogui.screenshot()
+            monitor = sct.monitors[1]
+        return sct.grab(monitor)
 
-        # Save screenshot
-        filepath = f'/tmp/screenshot_{hash(str(region))}.png'
-        screenshot.save(filepath)
-
-        return filepath
+    def _grab_to_file(self, region: Tuple[int, int, int, int], filepath: str):
+        """Capture with mss and write the raw pixels straight to a PNG"""
+        raw = self._grab(region)
+        mss.tools.to_png(raw.rgb, raw.size, output=filepath)
 
     async def mouse_move(self, x: int, y: int, duration: float = 0.5) -> Dict:
         """Move mouse to coordinates"""
@@ -101,7 +258,7 @@ class ComputerController:
             logger.info(f"Safe mode: Would move mouse to ({x}, {y})")
             return {'action': 'simulated', 'x': x, 'y': y}
 
-        pyautogui.moveTo(x, y, duration=duration)
+        await self._send_input(pyautogui.moveTo, x, y, duration=duration)
         return {'action': 'completed', 'x': x, 'y': y}
 
     async def mouse_click(self, button: str = 'left', clicks: int = 1) -> Dict:
@@ -110,33 +267,64 @@ class ComputerController:
             logger.info(f"Safe mode: Would click {button} button {clicks} times")
             return {'action': 'simulated', 'button': button, 'clicks': clicks}
 
-        pyautogui.click(button=button, clicks=clicks)
+        await self._send_input(pyautogui.click, button=button, clicks=clicks)
         return {'action': 'completed', 'button': button, 'clicks': clicks}
 
-    async def keyboard_type(self, text: str, interval: float = 0.05) -> Dict:
-        """Type text using keyboard"""
+    async def keyboard_type(self, text: str, interval: float = 0.05, mode: str = 'auto') -> Dict:
+        """
+        Type text using keyboard
+
+        Args:
+            text: Text to enter
+            interval: Delay between keystrokes when typing
+            mode: 'type' sends keystrokes, 'paste' pastes through the clipboard
+                (overwriting it), 'auto' pastes texts longer than PASTE_THRESHOLD
+
+        Returns:
+            Action result
+        """
         if self.safe_mode:
             logger.info(f"Safe mode: Would type text: {text[:50]}...")
             return {'action': 'simulated', 'text': text}
 
-        pyautogui.typewrite(text, interval=interval)
+        paste = mode == 'paste' or (mode == 'auto' and len(text) > PASTE_THRESHOLD)
+        if paste and pyperclip is not None:
+            try:
+                await self._send_input(self._paste, text)
+                return {'action': 'completed', 'text': text}
+            except pyperclip.PyperclipException as e:
+                # No clipboard mechanism on this host; only an explicit paste request fails
+                if mode == 'paste':
+                    raise
+                logger.warning(f"Clipboard unavailable, typing text instead: {e}")
+
+        await self._send_input(pyautogui.typewrite, text, interval=interval)
         return {'action': 'completed', 'text': text}
 
+    @staticmethod
+    def _paste(text: str):
+        """Copy text to the clipboard and paste it with one shortcut"""
+        pyperclip.copy(text)
+        modifier = 'command' if platform.system() == 'Darwin' else 'ctrl'
+        pyautogui.hotkey(modifier, 'v')
+
     async def keyboard_press(self, key: str) -> Dict:
         """Press a specific key"""
         if self.safe_mode:
             logger.info(f"Safe mode: Would press key: {key}")
             return {'action': 'simulated', 'key': key}
 
-        pyautogui.press(key)
+        await self._send_input(pyautogui.press, key)
         return {'action': 'completed', 'key': key}
 
-    async def run_command(self, command: str) -> Dict:
+    async def run_command(self, command: str, shell: bool = False) -> Dict:
         """
         Run a system command
 
         Args:
             command: Command to run
+            shell: Run through the system shell, for commands that need pipes,
+                redirection or globbing; otherwise the command is executed directly
 
         Returns:
             Command output and return code
@@ -146,23 +334,33 @@ class ComputerController:
             return {'action': 'simulated', 'command': command}
 
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            if shell:
+                process = await asyncio.create_subprocess_shell(
+                    command,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            else:
+                process = await asyncio.create_subprocess_exec(
+                    *shlex.split(command, posix=(os.name != 'nt')),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=30)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                return {'action': 'failed', 'error': 'Command timeout'}
 
             return {
                 'action': 'completed',
                 'command': command,
-                'stdout': result.stdout,
-                'stderr': result.stderr,
-                'return_code': result.returncode
+                'stdout': stdout.decode(errors='replace'),
+                'stderr': stderr.decode(errors='replace'),
+                'return_code': process.returncode
             }
-        except subprocess.TimeoutExpired:
-            return {'action': 'failed', 'error': 'Command timeout'}
         except Exception as e:
             return {'action': 'failed', 'error': str(e)}
 
@@ -177,14 +375,18 @@ class ComputerController:
             Coordinates if found, None otherwise
         """
         try:
-            location = pyautogui.locateOnScreen(image_path, confidence=0.8)
+            if cv2 is None:
+                location = await _fast_to_thread(pyautogui.locateOnScreen, image_path, confidence=0.8)
+            else:
+                template = self._load_template(image_path)
+                location = await _fast_to_thread(self._match_on_screen, template, 0.8)
 
             if location:
-                center = pyautogui.center(location)
+                left, top, width, height = location
                 return {
                     'found': True,
-                    'x': center.x,
-                    'y': center.y,
+                    'x': left + width // 2,
+                    'y': top + height // 2,
                     'box': location
                 }
             else:
@@ -192,10 +394,60 @@ class ComputerController:
         except Exception as e:
             return {'found': False, 'error': str(e)}
 
+    def _load_template(self, image_path: str):
+        """Load a grayscale template, reusing the decoded image until the file changes"""
+        mtime = os.path.getmtime(image_path)
+        cached = self._tpl_cache.get(image_path)
+        if cached is None or cached[0] != mtime:
+            template = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+            if template is None:
+                raise ValueError(f"Cannot read template image: {image_path}")
+            cached = self._tpl_cache[image_path] = (mtime, template)
+        return cached[1]
+
+    def _match_on_screen(self, template, confidence: float):
+        """
+        Find the best match of a template on the current screen
+
+        Returns:
+            (left, top, width, height) of the match, or None below confidence
+        """
+        if mss is not None:
+            # BGRA pixels straight from the capture buffer
+            screen = cv2.cvtColor(np.asarray(self._grab()), cv2.COLOR_BGRA2GRAY)
+        else:
+            screen = np.asarray(pyautogui.screenshot().convert('L'))
+        scores = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+        _, best, _, (left, top) = cv2.minMaxLoc(scores)
+        if best < confidence:
+            return None
+        height, width = template.shape
+        return (left, top, width, height)
+
+    def close(self):
+        """Release the screen capture handles opened by worker threads"""
+        handles, self._mss_handles = self._mss_handles, []
+        self._mss_local = threading.local()
+        for sct in handles:
+            try:
+                sct.close()
+            except Exception as e:
+                logger.warning(f"Failed to close screen capture handle: {e}")
+
     def get_screen_size(self) -> Tuple[int, int]:
-        """Get screen dimensions"""
-        return pyautogui.size()
+        """Get screen dimensions, queried once until reset_screen_cache()"""
+        if self._screen_size is None:
+            self._screen_size = pyautogui.size()
+        return self._screen_size
+
+    def reset_screen_cache(self):
+        """Forget the cached screen size, e.g. after a resolution change"""
+        self._screen_size = None
 
     def get_mouse_position(self) -> Tuple[int, int]:
-        """Get current mouse position"""
-        return pyautogui.position()
+        """Get current mouse position, reusing a reading from the last few milliseconds"""
+        now = time.monotonic()
+        if now - self._mouse_time >= MOUSE_POSITION_TTL:
+            self._mouse_position = pyautogui.position()
+            self._mouse_time = now
+        return self._mouse_position
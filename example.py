@@ -3,9 +3,7 @@
 Example usage of the Autonomous AI Agent
 """
 
-import asyncio
-import json
-from agent import AutonomousAgent
+from agent import AutonomousAgent, dumps_pretty, run_main
 
 
 async def example_web_search():
@@ -23,7 +21,7 @@ async def example_web_search():
     result = await agent.run("Search for 'Python asyncio tutorial' and summarize the top result")
 
     print(f"Status: {result['status']}")
-    print(f"Result: {json.dumps(result['result'], indent=2)}")
+    print(f"Result: {dumps_pretty(result['result'])}")
 
 
 async def example_code_execution():
@@ -48,7 +46,7 @@ async def example_code_execution():
 
     result = await agent.run(task)
     print(f"Status: {result['status']}")
-    print(f"Result: {json.dumps(result['result'], indent=2)}")
+    print(f"Result: {dumps_pretty(result['result'])}")
 
 
 async def example_autonomous_mode():
@@ -110,4 +108,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_main(main())
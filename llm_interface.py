@@ -3,14 +3,114 @@ LLM Interface Module
 Handles communication with language models for planning and reasoning
 """
 
+import asyncio
+import json
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Awaitable, Callable, Dict, List, Any, Optional, Tuple
 import anthropic
 import openai
 from anthropic import Anthropic
 
 logger = logging.getLogger(__name__)
 
+PLANNER_SYSTEM_PROMPT = """You are an AI agent planner. Given a task description and memory of previous actions,
+        create a detailed execution plan. Return a JSON object with the following structure:
+        {
+            "steps": [
+                {
+                    "action": "action_type",
+                    "parameters": {...},
+                    "description": "what this step does"
+                }
+            ],
+            "reasoning": "why this plan will accomplish the task"
+        }
+
+        Available actions:
+        - search_web: Search the web for information
+        - execute_code: Execute code in a safe environment
+        - control_computer: Control mouse, keyboard, or take screenshots
+        - llm_query: Ask the LLM a question
+        """
+
+BATCH_PLANNER_SYSTEM_PROMPT = PLANNER_SYSTEM_PROMPT + """
+        You will be given several numbered tasks. Return a JSON array containing
+        exactly one plan object per task, in the same order as the tasks."""
+
+
+class AsyncBatcher:
+    """
+    Collects concurrently submitted items and resolves them with a single
+    batch call once max_batch items are pending or max_wait_ms has passed
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_batch: int = 8, max_wait_ms: float = 20):
+        """
+        Initialize the batcher
+
+        Args:
+            batch_fn: Coroutine function mapping a list of items to a list of
+                results in the same order
+            max_batch: Largest number of items sent in one batch
+            max_wait_ms: Longest time an item waits for others to join its batch
+        """
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: set = set()
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Add an item to the next batch and wait for its result
+
+        Args:
+            item: Item to process
+
+        Returns:
+            Result produced for this item by the batch call
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Send all pending items as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Run the batch call and resolve each item's future"""
+        try:
+            results = await self.batch_fn([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Batch returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
 
 class LLMInterface:
     """Handles LLM API calls for planning and reasoning"""
@@ -27,6 +127,10 @@ class LLMInterface:
         self.temperature = config.get('temperature', 0.7)
         self.max_tokens = config.get('max_tokens', 2000)
 
+        # Plans keyed by (task description, memory digest)
+        self._plan_cache: Dict[tuple, Dict] = {}
+        self.plan_cache_size = config.get('plan_cache_size', 256)
+
         # Initialize appropriate client
         if 'claude' in self.model.lower():
             self.client = Anthropic(api_key=config.get('anthropic_api_key'))
@@ -69,7 +173,12 @@ class LLMInterface:
         }
 
         if system_prompt:
-            kwargs["system"] = system_prompt
+            # Mark the system prompt as a cacheable prefix for repeated calls
+            kwargs["system"] = [{
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"}
+            }]
 
         response = self.client.messages.create(**kwargs)
         return response.content[0].text
@@ -92,36 +201,23 @@ class LLMInterface:
 
         return response.choices[0].message.content
 
-    async def create_plan(self, task_description: str, memory: List[Dict]) -> Dict:
+    async def create_plan(self, task_description: str, memory: List[Dict],
+                          memory_digest: Optional[int] = None) -> Dict:
         """
         Create an execution plan for a task
 
         Args:
             task_description: Description of the task
             memory: Agent's memory of previous actions
+            memory_digest: Optional digest of the full memory; when given,
+                plans are cached and reused while the memory is unchanged
 
         Returns:
             Execution plan dictionary
         """
-        system_prompt = """You are an AI agent planner. Given a task description and memory of previous actions,
-        create a detailed execution plan. Return a JSON object with the following structure:
-        {
-            "steps": [
-                {
-                    "action": "action_type",
-                    "parameters": {...},
-                    "description": "what this step does"
-                }
-            ],
-            "reasoning": "why this plan will accomplish the task"
-        }
-
-        Available actions:
-        - search_web: Search the web for information
-        - execute_code: Execute code in a safe environment
-        - control_computer: Control mouse, keyboard, or take screenshots
-        - llm_query: Ask the LLM a question
-        """
+        cache_key = (task_description, memory_digest)
+        if memory_digest is not None and cache_key in self._plan_cache:
+            return self._plan_cache[cache_key]
 
         memory_summary = self._summarize_memory(memory)
 
@@ -132,25 +228,119 @@ Previous actions:
 
 Create an execution plan for this task."""
 
-        response = await self.query(prompt, system_prompt)
+        response = await self.query(prompt, PLANNER_SYSTEM_PROMPT)
 
         try:
             # Parse JSON response
-            import json
             plan = json.loads(response)
-            return plan
         except json.JSONDecodeError:
-            # Fallback plan
-            return {
-                "steps": [
-                    {
-                        "action": "llm_query",
-                        "parameters": {"prompt": task_description},
-                        "description": "Process task with LLM"
-                    }
-                ],
-                "reasoning": "Fallback plan due to parsing error"
-            }
+            return self._fallback_plan(task_description)
+
+        if memory_digest is not None:
+            self._cache_plan(cache_key, plan)
+
+        return plan
+
+    async def create_plans_batch(self, requests: List[Tuple[str, List[Dict], Optional[int]]]) -> List[Dict]:
+        """
+        Create execution plans for several tasks, with one LLM call per memory digest
+
+        Args:
+            requests: (task description, memory, memory digest) per task, as
+                accepted by create_plan
+
+        Returns:
+            One execution plan per request, in order
+        """
+        plans: List[Optional[Dict]] = [None] * len(requests)
+        uncached = []
+        for i, (description, _, digest) in enumerate(requests):
+            plan = self._plan_cache.get((description, digest)) if digest is not None else None
+            if plan is None:
+                uncached.append(i)
+            else:
+                plans[i] = plan
+
+        # A batched prompt carries one memory summary, so only tasks planned
+        # against the same memory digest share a call
+        groups: Dict[Any, List[int]] = {}
+        for i in uncached:
+            digest = requests[i][2]
+            groups.setdefault(digest if digest is not None else ('request', i), []).append(i)
+
+        results = await asyncio.gather(*(
+            self._plan_group(requests, indices) for indices in groups.values()
+        ))
+        for indices, batch in zip(groups.values(), results):
+            for i, plan in zip(indices, batch):
+                plans[i] = plan
+
+        return plans
+
+    async def _plan_group(self, requests: List[Tuple[str, List[Dict], Optional[int]]],
+                          indices: List[int]) -> List[Dict]:
+        """
+        Plan the given requests, which share a memory digest, in one LLM call
+
+        Args:
+            requests: All requests of the batch
+            indices: Positions of the requests to plan
+
+        Returns:
+            One execution plan per index, in order
+        """
+        if len(indices) == 1:
+            return [await self.create_plan(*requests[indices[0]])]
+
+        memory_summary = self._summarize_memory(requests[indices[0]][1])
+        task_lines = "\n".join(
+            f"{n}. {requests[i][0]}" for n, i in enumerate(indices, 1)
+        )
+        prompt = f"""Tasks:
+{task_lines}
+
+Previous actions:
+{memory_summary}
+
+Create an execution plan for each task."""
+
+        response = await self.query(prompt, BATCH_PLANNER_SYSTEM_PROMPT)
+
+        try:
+            batch = json.loads(response)
+            if (not isinstance(batch, list) or len(batch) != len(indices)
+                    or not all(isinstance(plan, dict) for plan in batch)):
+                raise ValueError("expected one plan object per task")
+        except ValueError:
+            # Includes JSONDecodeError; plan the tasks one by one instead
+            logger.warning("Batched plan response unusable, planning tasks individually")
+            return list(await asyncio.gather(*(
+                self.create_plan(*requests[i]) for i in indices
+            )))
+
+        for i, plan in zip(indices, batch):
+            description, _, digest = requests[i]
+            self._cache_plan((description, digest), plan)
+        return batch
+
+    def _cache_plan(self, key: Tuple[str, int], plan: Dict):
+        """Cache a plan, evicting the oldest entry when full"""
+        if len(self._plan_cache) >= self.plan_cache_size:
+            del self._plan_cache[next(iter(self._plan_cache))]
+        self._plan_cache[key] = plan
+
+    def _fallback_plan(self, task_description: str) -> Dict:
+        """Single-step plan used when the LLM response cannot be parsed"""
+        return {
+            "steps": [
+                {
+                    "action": "llm_query",
+                    "parameters": {"prompt": task_description},
+                    "description": "Process task with LLM"
+                }
+            ],
+            "reasoning": "Fallback plan due to parsing error"
+        }
 
     async def determine_next_action(self, goal: str, memory: List[Dict]) -> Dict:
         """
@@ -184,7 +374,6 @@ What should be the next action?"""
         response = await self.query(prompt, system_prompt)
 
         try:
-            import json
             return json.loads(response)
         except json.JSONDecodeError:
             return {
@@ -3,18 +3,93 @@ Advanced Metrics and Monitoring System
 Provides comprehensive metrics collection, analysis, and visualization
 """
 
+import asyncio
+import io
 import logging
 import time
-from typing import Dict, List, Any, Optional
+from bisect import bisect_right
+from typing import Dict, List, Any, Optional, TextIO
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 from collections import defaultdict, deque
+from itertools import islice
 import json
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; the kernels also run as plain NumPy
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from sortedcontainers import SortedList
+except ImportError:
+    SortedList = None
 
 logger = logging.getLogger(__name__)
 
+NS_PER_SECOND = 1_000_000_000
+
+# Health score for a latest value within baseline, warning and critical thresholds
+HEALTH_SCORES = (1.0, 0.7, 0.3)
+
+# Expired alerts kept for reuse
+ALERT_POOL_SIZE = 1024
+
+# Points encoded per write when exporting
+EXPORT_CHUNK = 4096
+
+
+def _dumps(obj) -> str:
+    """Encode an object as compact JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def _utc_datetime(ts_ns: int) -> datetime:
+    """UTC datetime for an epoch timestamp in nanoseconds"""
+    return datetime.fromtimestamp(ts_ns / NS_PER_SECOND, timezone.utc)
+
+
+@njit(cache=True)
+def _rank_indices(n):
+    """Positions of the median, p95 and p99 in n sorted values"""
+    k95 = int(n * 0.95) if n > 20 else n - 1
+    k99 = int(n * 0.99) if n > 100 else n - 1
+    return n // 2, k95, k99
 
-@dataclass
+
+@njit(cache=True, fastmath=True)
+def _aggregate(values):
+    """
+    Reduce a window of metric values to summary statistics
+
+    Returns:
+        (mean, std, min, max, median, p95, p99) tuple
+    """
+    k50, k95, k99 = _rank_indices(values.shape[0])
+    # Only the order statistics we report need to land in place
+    ranked = np.partition(values, np.array([k50, k95, k99]))
+    return (values.mean(), values.std(), values.min(), values.max(),
+            ranked[k50], ranked[k95], ranked[k99])
+
+
+@njit(cache=True, fastmath=True)
+def _outlier_indices(values, mean, limit):
+    """Positions of values further than limit from mean (one fused pass under Numba)"""
+    return np.flatnonzero(np.abs(values - mean) > limit)
+
+
+@dataclass(slots=True, frozen=True)
 class Metric:
     """Individual metric data point"""
     name: str
@@ -24,7 +99,233 @@ class Metric:
     unit: str = ""
 
 
-@dataclass
+class _MetricSeries:
+    """
+    Fixed-capacity ring of metric points stored as parallel arrays
+
+    Timestamps (epoch nanoseconds, int64) and values (float64) live in arrays so scans
+    are contiguous; the rare tagged points keep their tags in a dict by slot.
+    Mean and variance of the stored values are maintained online (Welford),
+    and with sortedcontainers installed so is their sorted order.
+    """
+
+    __slots__ = ('ts', 'val', 'head', 'size', 'cap', 'unit', 'tags', 'mean', 'm2', 'sorted', 'ranked')
+
+    def __init__(self, cap: int = 10000):
+        self.ts = np.empty(cap, dtype=np.int64)
+        self.val = np.empty(cap, dtype=np.float64)
+        self.head = 0
+        self.size = 0
+        self.cap = cap
+        self.unit = ""
+        self.tags: Dict[int, Dict[str, str]] = {}
+        self.mean = 0.0
+        self.m2 = 0.0
+        # Sorted copy of the values, dropped whenever they change
+        self.sorted: Optional[np.ndarray] = None
+        # Values kept in order incrementally, when sortedcontainers is available
+        self.ranked = SortedList() if SortedList is not None else None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, timestamp: int, value: float, tags: Dict[str, str] = None, unit: str = ""):
+        """Write a point, overwriting the oldest one when full"""
+        head = self.head
+        self.sorted = None
+        if self.size == self.cap:
+            # Take the overwritten point out of the running statistics
+            old = self.val[head]
+            if self.ranked is not None:
+                self.ranked.discard(float(old))
+            n = self.size - 1
+            mean = (self.mean * self.size - old) / n if n else 0.0
+            self.m2 -= (old - self.mean) * (old - mean)
+            self.mean = mean
+            self.size = n
+
+        self.size += 1
+        delta = value - self.mean
+        self.mean += delta / self.size
+        self.m2 += delta * (value - self.mean)
+
+        self.ts[head] = timestamp
+        self.val[head] = value
+        if self.ranked is not None:
+            self.ranked.add(float(value))
+        if tags:
+            self.tags[head] = tags
+        elif self.tags:
+            self.tags.pop(head, None)
+        if unit:
+            self.unit = unit
+
+        self.head = head + 1 if head + 1 < self.cap else 0
+
+    def _ordered(self, array: np.ndarray) -> np.ndarray:
+        """View of a ring array oldest first; copies only when the points wrap around"""
+        parts = self._slices(0, self.size)
+        if len(parts) == 1:
+            return array[parts[0]]
+        return np.concatenate([array[part] for part in parts])
+
+    def timestamps(self) -> np.ndarray:
+        """Timestamps oldest first"""
+        return self._ordered(self.ts)
+
+    def values(self) -> np.ndarray:
+        """Values oldest first"""
+        return self._ordered(self.val)
+
+    def std(self) -> float:
+        """Population standard deviation of the stored values"""
+        return (max(self.m2, 0.0) / self.size) ** 0.5 if self.size else 0.0
+
+    def latest(self) -> float:
+        """Most recently recorded value"""
+        return float(self.val[self.head - 1])
+
+    def sorted_values(self):
+        """Values in ascending order, sorted at most once between appends"""
+        if self.ranked is not None:
+            return self.ranked
+        if self.sorted is None:
+            self.sorted = np.sort(self.values())
+        return self.sorted
+
+    def sorted_if_ready(self):
+        """Values in ascending order if available without sorting, else None"""
+        return self.ranked if self.ranked is not None else self.sorted
+
+    def window_start(self, cutoff: int) -> int:
+        """Position (oldest first) of the first point recorded at or after cutoff"""
+        # Points are appended in time order, so the window is a suffix.
+        # When they wrap around, search the older and newer parts in place
+        start = 0
+        for part in self._slices(0, self.size):
+            found = int(np.searchsorted(self.ts[part], cutoff))
+            start += found
+            if found < part.stop - part.start:
+                break
+        return start
+
+    def _slices(self, start: int, stop: int):
+        """Physical slices of the ring holding positions [start, stop), oldest first"""
+        cap = self.cap
+        lo = (self.head - self.size) % cap + start
+        hi = lo + stop - start
+        if hi <= cap:
+            return (slice(lo, hi),)
+        if lo >= cap:
+            return (slice(lo - cap, hi - cap),)
+        return (slice(lo, cap), slice(0, hi - cap))
+
+    def range_mean(self, start: int, stop: int) -> float:
+        """Mean of the values at positions [start, stop), without reordering the ring"""
+        total = sum(float(self.val[part].sum()) for part in self._slices(start, stop))
+        return total / (stop - start)
+
+    def window(self, cutoff: int) -> np.ndarray:
+        """Values recorded at or after cutoff, oldest first"""
+        return self.values()[self.window_start(cutoff):]
+
+    def points(self, name: str, indices=None) -> List['Metric']:
+        """Materialize points (all, or by position oldest first) as Metric objects"""
+        ts = self.timestamps()
+        vals = self.values()
+        base = self.head - self.size
+        if indices is None:
+            indices = range(self.size)
+        return [
+            Metric(
+                name=name,
+                value=float(vals[i]),
+                timestamp=_utc_datetime(int(ts[i])),
+                tags=dict(self.tags.get((base + i) % self.cap, ())),
+                unit=self.unit
+            )
+            for i in indices
+        ]
+
+    def write_json(self, out: TextIO):
+        """Write the points as comma-separated JSON objects, a chunk at a time"""
+        no_tags: Dict[str, str] = {}
+        unit = self.unit
+        first = True
+        for part in self._slices(0, self.size):
+            for lo in range(part.start, part.stop, EXPORT_CHUNK):
+                hi = min(lo + EXPORT_CHUNK, part.stop)
+                stamps = np.datetime_as_string(self.ts[lo:hi].astype('datetime64[ns]'), unit='us')
+                records = [
+                    {'value': value, 'timestamp': stamp, 'tags': self.tags.get(slot, no_tags), 'unit': unit}
+                    for slot, value, stamp in zip(range(lo, hi), self.val[lo:hi].tolist(), stamps.tolist())
+                ]
+                # Drop the list brackets so chunks join into one array
+                out.write(('\n    ' if first else ',\n    ') + _dumps(records)[1:-1])
+                first = False
+
+    def keep_since(self, cutoff: int):
+        """Drop points recorded before cutoff by advancing the start of the ring"""
+        # Nothing to do unless the oldest point has expired
+        if not self.size or self.ts[(self.head - self.size) % self.cap] >= cutoff:
+            return
+
+        start = self.window_start(cutoff)
+        if not start:
+            return
+
+        remaining = self.size - start
+        if remaining:
+            # Subtract the dropped points' mean and M2 from the running statistics
+            dropped = [self.val[part] for part in self._slices(0, start)]
+            dropped_mean = sum(float(part.sum()) for part in dropped) / start
+            dropped_m2 = sum(float(((part - dropped_mean) ** 2).sum()) for part in dropped)
+            mean = (self.mean * self.size - dropped_mean * start) / remaining
+            delta = mean - dropped_mean
+            self.m2 -= dropped_m2 + delta * delta * start * remaining / self.size
+            self.mean = mean
+        else:
+            self.mean = self.m2 = 0.0
+
+        if self.ranked is not None:
+            if remaining:
+                for part in self._slices(0, start):
+                    for value in self.val[part].tolist():
+                        self.ranked.discard(value)
+            else:
+                self.ranked.clear()
+
+        if self.tags:
+            base = self.head - self.size
+            self.tags = {
+                slot: point_tags for slot, point_tags in self.tags.items()
+                if (slot - base) % self.cap >= start
+            }
+        self.size = remaining
+        self.sorted = None
+
+
+@dataclass(slots=True)
+class Alert:
+    """Baseline threshold crossing"""
+    severity: str
+    metric: str
+    value: float
+    threshold: float
+    ts_ns: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Report form of the alert, with an ISO timestamp"""
+        return {
+            'severity': self.severity,
+            'metric': self.metric,
+            'value': self.value,
+            'threshold': self.threshold,
+            'timestamp': _utc_datetime(self.ts_ns).isoformat()
+        }
+
+
+@dataclass(slots=True, frozen=True)
 class PerformanceBaseline:
     """Performance baseline for comparison"""
     metric_name: str
@@ -42,60 +343,88 @@ class MetricsMonitor:
     def __init__(self, agent_ref, retention_hours: int = 24):
         self.agent = agent_ref
         self.retention_hours = retention_hours
-        self.metrics: Dict[str, deque] = defaultdict(lambda: deque(maxlen=10000))
+        self.metrics: Dict[str, _MetricSeries] = defaultdict(_MetricSeries)
         self.baselines: Dict[str, PerformanceBaseline] = {}
-        self.alerts: List[Dict] = []
+        # (names, thresholds) arrays for scoring, rebuilt when baselines change
+        self._baseline_cache: Optional[tuple] = None
+        # Alerts in the order raised, with their timestamps alongside for bisecting
+        self.alerts: deque = deque()
+        self._alert_ts: deque = deque()
+        # Expired Alert objects kept for reuse, up to ALERT_POOL_SIZE
+        self._alert_pool: List[Alert] = []
+        # Set whenever a metric crosses a baseline threshold
+        self.threshold_crossed = asyncio.Event()
         
         logger.info("Metrics Monitor initialized")
     
     def record_metric(self, name: str, value: float, tags: Dict[str, str] = None, unit: str = ""):
         """Record a metric value"""
-        metric = Metric(
-            name=name,
-            value=value,
-            timestamp=datetime.utcnow(),
-            tags=tags or {},
-            unit=unit
-        )
-        
-        self.metrics[name].append(metric)
+        self.metrics[name].append(time.time_ns(), value, tags, unit)
         
         # Check against baseline if exists
         if name in self.baselines:
             self._check_baseline(name, value)
-    
+
+    def record_metrics(self, items: List[tuple], tags: Dict[str, str] = None):
+        """
+        Record several metric values sharing one timestamp
+
+        Args:
+            items: (name, value, unit) tuples
+            tags: Tags applied to every value
+        """
+        timestamp = time.time_ns()
+        metrics = self.metrics
+        baselines = self.baselines
+
+        for name, value, unit in items:
+            metrics[name].append(timestamp, value, tags, unit)
+            if name in baselines:
+                self._check_baseline(name, value)
+
     def _check_baseline(self, metric_name: str, value: float):
         """Check if metric value exceeds baseline thresholds"""
         baseline = self.baselines[metric_name]
         
         if value >= baseline.threshold_critical:
-            self.alerts.append({
-                'severity': 'critical',
-                'metric': metric_name,
-                'value': value,
-                'threshold': baseline.threshold_critical,
-                'timestamp': datetime.utcnow().isoformat()
-            })
+            self._add_alert('critical', metric_name, value, baseline.threshold_critical)
             logger.critical(f"CRITICAL: {metric_name} = {value} (threshold: {baseline.threshold_critical})")
+            self.threshold_crossed.set()
         
         elif value >= baseline.threshold_warning:
-            self.alerts.append({
-                'severity': 'warning',
-                'metric': metric_name,
-                'value': value,
-                'threshold': baseline.threshold_warning,
-                'timestamp': datetime.utcnow().isoformat()
-            })
+            self._add_alert('warning', metric_name, value, baseline.threshold_warning)
             logger.warning(f"WARNING: {metric_name} = {value} (threshold: {baseline.threshold_warning})")
+            self.threshold_crossed.set()
     
+    def _add_alert(self, severity: str, metric_name: str, value: float, threshold: float):
+        """Record an alert, dropping alerts older than the retention period"""
+        now = time.time_ns()
+        expired = now - self.retention_hours * 3600 * NS_PER_SECOND
+        while self._alert_ts and self._alert_ts[0] < expired:
+            self._alert_ts.popleft()
+            stale = self.alerts.popleft()
+            if len(self._alert_pool) < ALERT_POOL_SIZE:
+                self._alert_pool.append(stale)
+
+        if self._alert_pool:
+            alert = self._alert_pool.pop()
+            alert.severity = severity
+            alert.metric = metric_name
+            alert.value = value
+            alert.threshold = threshold
+            alert.ts_ns = now
+        else:
+            alert = Alert(severity, metric_name, value, threshold, now)
+        self.alerts.append(alert)
+        self._alert_ts.append(now)
+
     def establish_baseline(self, metric_name: str, percentile: float = 0.95):
         """Establish performance baseline from historical data"""
         if metric_name not in self.metrics or len(self.metrics[metric_name]) < 10:
             logger.warning(f"Insufficient data to establish baseline for {metric_name}")
             return
         
-        values = [m.value for m in self.metrics[metric_name]]
-        values.sort()
+        values = self.metrics[metric_name].sorted_values()
         
         # Calculate percentile-based thresholds
         baseline_idx = int(len(values) * 0.5)
@@ -104,13 +433,14 @@ class MetricsMonitor:
         
         baseline = PerformanceBaseline(
             metric_name=metric_name,
-            baseline_value=values[baseline_idx],
-            threshold_warning=values[warning_idx],
-            threshold_critical=values[critical_idx],
+            baseline_value=float(values[baseline_idx]),
+            threshold_warning=float(values[warning_idx]),
+            threshold_critical=float(values[critical_idx]),
             sample_size=len(values)
         )
         
         self.baselines[metric_name] = baseline
+        self._baseline_cache = None
         logger.info(f"Baseline established for {metric_name}: {baseline.baseline_value} "
                    f"(warn: {baseline.threshold_warning}, crit: {baseline.threshold_critical})")
     
@@ -119,25 +449,32 @@ class MetricsMonitor:
         if metric_name not in self.metrics:
             return {}
         
-        cutoff_time = datetime.utcnow() - timedelta(minutes=window_minutes)
-        recent_values = [
-            m.value for m in self.metrics[metric_name]
-            if m.timestamp >= cutoff_time
-        ]
+        series = self.metrics[metric_name]
+        start = series.window_start(time.time_ns() - window_minutes * 60 * NS_PER_SECOND)
+        count = len(series) - start
         
-        if not recent_values:
+        if not count:
             return {}
         
-        recent_values.sort()
+        ordered = series.sorted_if_ready() if start == 0 else None
+        if ordered is not None:
+            # Whole series in the window and its sorted order already known
+            k50, k95, k99 = _rank_indices(count)
+            mean, std = series.mean, series.std()
+            minimum, maximum = ordered[0], ordered[-1]
+            median, p95, p99 = ordered[k50], ordered[k95], ordered[k99]
+        else:
+            mean, std, minimum, maximum, median, p95, p99 = _aggregate(series.values()[start:])
         
         return {
-            'count': len(recent_values),
-            'min': recent_values[0],
-            'max': recent_values[-1],
-            'mean': sum(recent_values) / len(recent_values),
-            'median': recent_values[len(recent_values) // 2],
-            'p95': recent_values[int(len(recent_values) * 0.95)] if len(recent_values) > 20 else recent_values[-1],
-            'p99': recent_values[int(len(recent_values) * 0.99)] if len(recent_values) > 100 else recent_values[-1]
+            'count': int(count),
+            'min': float(minimum),
+            'max': float(maximum),
+            'mean': float(mean),
+            'std': float(std),
+            'median': float(median),
+            'p95': float(p95),
+            'p99': float(p99)
         }
     
     def detect_anomalies(self, metric_name: str, sensitivity: float = 2.0) -> List[Metric]:
@@ -145,37 +482,28 @@ class MetricsMonitor:
         if metric_name not in self.metrics or len(self.metrics[metric_name]) < 20:
             return []
         
-        values = [m.value for m in self.metrics[metric_name]]
-        mean = sum(values) / len(values)
-        variance = sum((x - mean) ** 2 for x in values) / len(values)
-        std_dev = variance ** 0.5
+        series = self.metrics[metric_name]
         
-        # Find values beyond sensitivity * std_dev
-        anomalies = []
-        for metric in self.metrics[metric_name]:
-            if abs(metric.value - mean) > sensitivity * std_dev:
-                anomalies.append(metric)
-        
-        return anomalies
+        # Find values beyond sensitivity * std_dev in one vectorized pass
+        outliers = _outlier_indices(series.values(), series.mean, sensitivity * series.std())
+        return series.points(metric_name, outliers)
     
     def get_trend(self, metric_name: str, window_minutes: int = 60) -> str:
         """Determine trend direction for a metric"""
         if metric_name not in self.metrics:
             return 'unknown'
         
-        cutoff_time = datetime.utcnow() - timedelta(minutes=window_minutes)
-        recent_metrics = [
-            m for m in self.metrics[metric_name]
-            if m.timestamp >= cutoff_time
-        ]
+        series = self.metrics[metric_name]
+        start = series.window_start(time.time_ns() - window_minutes * 60 * NS_PER_SECOND)
+        end = len(series)
         
-        if len(recent_metrics) < 5:
+        if end - start < 5:
             return 'insufficient_data'
         
         # Simple trend analysis: compare first half vs second half
-        mid = len(recent_metrics) // 2
-        first_half_avg = sum(m.value for m in recent_metrics[:mid]) / mid
-        second_half_avg = sum(m.value for m in recent_metrics[mid:]) / (len(recent_metrics) - mid)
+        mid = start + (end - start) // 2
+        first_half_avg = series.range_mean(start, mid)
+        second_half_avg = series.range_mean(mid, end)
         
         diff_percent = ((second_half_avg - first_half_avg) / first_half_avg) * 100
         
@@ -191,38 +519,42 @@ class MetricsMonitor:
         if not self.baselines:
             return 0.5  # Unknown health
         
-        scores = []
+        names, thresholds = self._baseline_table()
+        series = [self.metrics.get(metric_name) for metric_name in names]
+        has_data = np.fromiter((bool(s) for s in series), dtype=bool, count=len(names))
+        if not has_data.any():
+            return 0.5
         
-        for metric_name, baseline in self.baselines.items():
-            if metric_name not in self.metrics or not self.metrics[metric_name]:
-                continue
-            
-            latest_value = self.metrics[metric_name][-1].value
-            
-            # Score based on how far from critical threshold
-            if latest_value <= baseline.baseline_value:
-                score = 1.0
-            elif latest_value <= baseline.threshold_warning:
-                score = 0.7
-            elif latest_value <= baseline.threshold_critical:
-                score = 0.3
-            else:
-                score = 0.0
-            
-            scores.append(score)
+        latest = np.fromiter((s.latest() if s else np.nan for s in series), dtype=np.float64, count=len(names))
         
-        return sum(scores) / len(scores) if scores else 0.5
+        # Score based on how far from critical threshold
+        scores = np.select(latest <= thresholds, HEALTH_SCORES, default=0.0)
+        return float(scores[has_data].mean())
+
+    def _baseline_table(self) -> tuple:
+        """Baseline names and a (3, n) array of baseline/warning/critical values"""
+        if self._baseline_cache is None or self._baseline_cache[0] != tuple(self.baselines):
+            names = tuple(self.baselines)
+            thresholds = np.array([
+                [b.baseline_value for b in self.baselines.values()],
+                [b.threshold_warning for b in self.baselines.values()],
+                [b.threshold_critical for b in self.baselines.values()]
+            ], dtype=np.float64)
+            self._baseline_cache = (names, thresholds)
+        return self._baseline_cache
     
     def get_comprehensive_report(self) -> Dict[str, Any]:
         """Generate comprehensive metrics report"""
+        # Alerts are in time order, so the active ones are a suffix
+        first_active = bisect_right(self._alert_ts, time.time_ns() - 3600 * NS_PER_SECOND)
         report = {
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
             'health_score': self.generate_health_score(),
             'total_metrics_tracked': len(self.metrics),
             'total_data_points': sum(len(v) for v in self.metrics.values()),
-            'active_alerts': [a for a in self.alerts if 
-                            datetime.fromisoformat(a['timestamp']) > 
-                            datetime.utcnow() - timedelta(hours=1)],
+            'active_alerts': [
+                alert.to_dict() for alert in islice(self.alerts, first_active, None)
+            ],
             'metrics_summary': {}
         }
         
@@ -244,34 +576,35 @@ class MetricsMonitor:
         
         return report
     
-    def export_metrics(self, format: str = 'json') -> str:
-        """Export metrics in specified format"""
-        if format == 'json':
-            data = {
-                metric_name: [
-                    {
-                        'value': m.value,
-                        'timestamp': m.timestamp.isoformat(),
-                        'tags': m.tags,
-                        'unit': m.unit
-                    }
-                    for m in metrics
-                ]
-                for metric_name, metrics in self.metrics.items()
-            }
-            return json.dumps(data, indent=2)
-        else:
+    def export_metrics(self, format: str = 'json', out: Optional[TextIO] = None) -> Optional[str]:
+        """
+        Export metrics in specified format
+
+        Args:
+            format: Export format; only 'json' is supported
+            out: Text stream to write to; the export is returned as a string if omitted
+
+        Returns:
+            The exported metrics, or None when written to out
+        """
+        if format != 'json':
             raise ValueError(f"Unsupported format: {format}")
+
+        target = out if out is not None else io.StringIO()
+        target.write('{')
+        for n, (metric_name, series) in enumerate(self.metrics.items()):
+            target.write(f'{"," if n else ""}\n  {_dumps(metric_name)}: [')
+            series.write_json(target)
+            target.write('\n  ]')
+        target.write('\n}')
+
+        return target.getvalue() if out is None else None
     
     def cleanup_old_metrics(self):
         """Remove metrics older than retention period"""
-        cutoff_time = datetime.utcnow() - timedelta(hours=self.retention_hours)
+        cutoff_time = time.time_ns() - self.retention_hours * 3600 * NS_PER_SECOND
         
-        for metric_name in self.metrics.keys():
-            # Filter out old metrics
-            self.metrics[metric_name] = deque(
-                (m for m in self.metrics[metric_name] if m.timestamp >= cutoff_time),
-                maxlen=10000
-            )
+        for series in self.metrics.values():
+            series.keep_since(cutoff_time)
         
         logger.info(f"Cleaned up metrics older than {self.retention_hours} hours")
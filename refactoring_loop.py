@@ -3,15 +3,81 @@ Autonomous Refactoring Loop
 Continuously analyzes and improves agent's own code
 """
 
+import asyncio
 import logging
 import ast
+import functools
 import os
-from typing import Dict, List, Any, Tuple
+import re
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import json
 
 logger = logging.getLogger(__name__)
 
+# Analyzed files kept, least recently used evicted first
+ANALYSIS_CACHE_SIZE = 256
+
+# try/except clause keywords, tallied in one scan of the source
+_TRY_EXCEPT_RE = re.compile(r'\btry:|\bexcept\b')
+
+# Numbered lines of an LLM suggestion list
+_SUGGESTION_RE = re.compile(r'^\s*\d.*$', re.MULTILINE)
+
+
+@functools.lru_cache(maxsize=64)
+def _count_functions(code: str) -> int:
+    """Parse code and count its function definitions (raises SyntaxError)"""
+    return sum(1 for node in ast.walk(ast.parse(code)) if isinstance(node, ast.FunctionDef))
+
+
+class _MetricsVisitor(ast.NodeVisitor):
+    """Collects definition counts, function lengths, docstrings and complexity in one pass"""
+
+    def __init__(self):
+        self.num_functions = 0
+        self.num_classes = 0
+        self.max_complexity = 0
+        self.function_lengths: List[int] = []
+        self.docstring_count = 0
+        # Branch counts of the functions enclosing the current node
+        self._complexity: List[int] = []
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        self.num_functions += 1
+
+        # Function length
+        if hasattr(node, 'end_lineno') and hasattr(node, 'lineno'):
+            self.function_lengths.append(node.end_lineno - node.lineno)
+
+        # Docstring
+        if ast.get_docstring(node):
+            self.docstring_count += 1
+
+        # Complexity (simple approximation): branches anywhere in the body,
+        # nested functions included
+        self._complexity.append(0)
+        self.generic_visit(node)
+        complexity = self._complexity.pop()
+        self.max_complexity = max(self.max_complexity, complexity)
+        if self._complexity:
+            self._complexity[-1] += complexity
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        self.num_classes += 1
+        if ast.get_docstring(node):
+            self.docstring_count += 1
+        self.generic_visit(node)
+
+    def _visit_branch(self, node: ast.AST):
+        if self._complexity:
+            self._complexity[-1] += 1
+        self.generic_visit(node)
+
+    visit_If = visit_For = visit_While = visit_Try = _visit_branch
+
 
 class RefactoringLoop:
     """
@@ -23,8 +89,20 @@ class RefactoringLoop:
         self.refactoring_history: List[Dict] = []
         self.code_quality_metrics: Dict[str, float] = {}
 
+        # filepath -> ((mtime_ns, size), code, metrics, issues) for unchanged files
+        self._analysis_cache: OrderedDict = OrderedDict()
+
+        # Worker processes for parsing, started on first use
+        self._pool: Optional[ProcessPoolExecutor] = None
+
         logger.info("Refactoring Loop initialized")
 
+    def close(self):
+        """Shut down the parsing worker processes, if they were started"""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
     async def analyze_codebase(self, file_paths: List[str]) -> Dict[str, Any]:
         """Analyze codebase for improvement opportunities"""
         logger.info(f"Analyzing {len(file_paths)} files")
@@ -36,8 +114,10 @@ class RefactoringLoop:
             'metrics': {}
         }
 
-        for filepath in file_paths:
-            file_analysis = await self._analyze_file(filepath)
+        # Files are independent, so analyze them concurrently
+        file_analyses = await asyncio.gather(*(self._analyze_file(filepath) for filepath in file_paths))
+
+        for filepath, file_analysis in zip(file_paths, file_analyses):
             analysis['issues_found'].extend(file_analysis['issues'])
             analysis['suggestions'].extend(file_analysis['suggestions'])
             analysis['metrics'][filepath] = file_analysis['metrics']
@@ -47,17 +127,7 @@ class RefactoringLoop:
     async def _analyze_file(self, filepath: str) -> Dict:
         """Analyze a single file"""
         try:
-            with open(filepath, 'r') as f:
-                code = f.read()
-
-            # Parse AST
-            tree = ast.parse(code)
-
-            # Calculate metrics
-            metrics = self._calculate_code_metrics(tree, code)
-
-            # Identify issues
-            issues = self._identify_issues(tree, code, metrics)
+            code, metrics, issues = await self._analyze_source(filepath)
 
             # Generate suggestions
             suggestions = await self._generate_suggestions(filepath, code, issues, metrics)
@@ -72,7 +142,36 @@ class RefactoringLoop:
             logger.error(f"Error analyzing {filepath}: {e}")
             return {'issues': [], 'suggestions': [], 'metrics': {}}
 
-    def _calculate_code_metrics(self, tree: ast.AST, code: str) -> Dict[str, float]:
+    async def _analyze_source(self, filepath: str) -> Tuple[str, Dict, List[Dict]]:
+        """
+        Read, parse and measure a file, reusing the result while it is unchanged
+
+        Returns:
+            (code, metrics, issues) tuple
+        """
+        stat = os.stat(filepath)
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._analysis_cache.get(filepath)
+        if cached is not None and cached[0] == key:
+            self._analysis_cache.move_to_end(filepath)
+            _, code, metrics, issues = cached
+            return code, dict(metrics), [dict(issue) for issue in issues]
+
+        # Parsing is CPU-bound, so it runs in worker processes
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        loop = asyncio.get_running_loop()
+        code, metrics, issues = await loop.run_in_executor(self._pool, _measure_source, filepath)
+
+        self._analysis_cache[filepath] = (key, code, dict(metrics), [dict(issue) for issue in issues])
+        self._analysis_cache.move_to_end(filepath)
+        if len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+            self._analysis_cache.popitem(last=False)
+
+        return code, metrics, issues
+
+    @staticmethod
+    def _calculate_code_metrics(tree: ast.AST, code: str) -> Dict[str, float]:
         """Calculate code quality metrics"""
         metrics = {
             'lines_of_code': len(code.split('\n')),
@@ -83,43 +182,25 @@ class RefactoringLoop:
             'documentation_ratio': 0.0
         }
 
-        function_lengths = []
-        docstring_count = 0
-        total_definitions = 0
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                metrics['num_functions'] += 1
-                total_definitions += 1
-
-                # Function length
-                if hasattr(node, 'end_lineno') and hasattr(node, 'lineno'):
-                    func_len = node.end_lineno - node.lineno
-                    function_lengths.append(func_len)
+        # One traversal gathers every counter
+        visitor = _MetricsVisitor()
+        visitor.visit(tree)
 
-                # Docstring
-                if ast.get_docstring(node):
-                    docstring_count += 1
+        metrics['num_functions'] = visitor.num_functions
+        metrics['num_classes'] = visitor.num_classes
+        metrics['max_complexity'] = visitor.max_complexity
 
-                # Complexity (simple approximation)
-                complexity = sum(1 for _ in ast.walk(node) if isinstance(_, (ast.If, ast.For, ast.While, ast.Try)))
-                metrics['max_complexity'] = max(metrics['max_complexity'], complexity)
-
-            elif isinstance(node, ast.ClassDef):
-                metrics['num_classes'] += 1
-                total_definitions += 1
-                if ast.get_docstring(node):
-                    docstring_count += 1
-
-        if function_lengths:
-            metrics['avg_function_length'] = sum(function_lengths) / len(function_lengths)
+        if visitor.function_lengths:
+            metrics['avg_function_length'] = sum(visitor.function_lengths) / len(visitor.function_lengths)
 
+        total_definitions = visitor.num_functions + visitor.num_classes
         if total_definitions > 0:
-            metrics['documentation_ratio'] = docstring_count / total_definitions
+            metrics['documentation_ratio'] = visitor.docstring_count / total_definitions
 
         return metrics
 
-    def _identify_issues(self, tree: ast.AST, code: str, metrics: Dict) -> List[Dict]:
+    @staticmethod
+    def _identify_issues(tree: ast.AST, code: str, metrics: Dict) -> List[Dict]:
         """Identify code issues"""
         issues = []
 
@@ -148,8 +229,8 @@ class RefactoringLoop:
             })
 
         # Check for code smells
-        code_lower = code.lower()
-        if code.count('try:') > code.count('except'):
+        clauses = Counter(match.group() for match in _TRY_EXCEPT_RE.finditer(code))
+        if clauses['try:'] > clauses['except']:
             issues.append({
                 'type': 'bare_except',
                 'severity': 'medium',
@@ -175,7 +256,7 @@ class RefactoringLoop:
         Provide 3-5 specific, actionable refactoring suggestions:"""
 
         response = await self.agent.llm.query(prompt)
-        suggestions = [line.strip() for line in response.split('\n') if line.strip() and line.strip()[0].isdigit()]
+        suggestions = [match.group().strip() for match in _SUGGESTION_RE.finditer(response)]
 
         return suggestions
 
@@ -198,8 +279,11 @@ class RefactoringLoop:
             # Generate refactored code
             refactored = await self._refactor_code(original_code, filepath)
 
-            # Validate refactored code
-            if await self._validate_refactoring(original_code, refactored):
+            # Validate refactored code, reusing the function count from a
+            # previous analysis of the same source when there is one
+            cached = self._analysis_cache.get(filepath)
+            original_funcs = cached[2]['num_functions'] if cached and cached[1] == original_code else None
+            if await self._validate_refactoring(original_code, refactored, original_funcs):
                 # Write refactored code
                 with open(filepath, 'w') as f:
                     f.write(refactored)
@@ -242,16 +326,25 @@ class RefactoringLoop:
         refactored = await self.agent.llm.query(prompt)
         return refactored
 
-    async def _validate_refactoring(self, original: str, refactored: str) -> bool:
-        """Validate that refactoring maintains functionality"""
-        try:
-            # Check syntax
-            ast.parse(refactored)
+    async def _validate_refactoring(self, original: str, refactored: str,
+                                    original_funcs: Optional[int] = None) -> bool:
+        """
+        Validate that refactoring maintains functionality
 
-            # Check that it doesn't remove major functionality
-            # (simplified check)
-            original_funcs = len([n for n in ast.walk(ast.parse(original)) if isinstance(n, ast.FunctionDef)])
-            refactored_funcs = len([n for n in ast.walk(ast.parse(refactored)) if isinstance(n, ast.FunctionDef)])
+        Args:
+            original: Source before refactoring
+            refactored: Proposed refactored source
+            original_funcs: Function count of the original, if already known
+
+        Returns:
+            True if the refactored source is acceptable
+        """
+        try:
+            # Check syntax, and that it doesn't remove major functionality
+            # (simplified check); each source is parsed at most once
+            refactored_funcs = _count_functions(refactored)
+            if original_funcs is None:
+                original_funcs = _count_functions(original)
 
             if refactored_funcs < original_funcs * 0.8:
                 logger.warning("Refactoring removed too many functions")
@@ -262,3 +355,27 @@ class RefactoringLoop:
         except Exception as e:
             logger.error(f"Validation failed: {e}")
             return False
+
+
+def _measure_source(filepath: str) -> Tuple[str, Dict, List[Dict]]:
+    """
+    Read, parse and measure a file; runs in a worker process
+
+    Returns:
+        (code, metrics, issues) tuple
+    """
+    with open(filepath, 'r') as f:
+        code = f.read()
+
+    # Parse AST
+    tree = ast.parse(code)
+
+    # Calculate metrics
+    metrics = RefactoringLoop._calculate_code_metrics(tree, code)
+
+    # Identify issues
+    issues = RefactoringLoop._identify_issues(tree, code, metrics)
+    for issue in issues:
+        issue['filepath'] = filepath
+
+    return code, metrics, issues
@@ -5,11 +5,13 @@ Provides advanced resilience patterns including circuit breakers, retry logic, a
 
 import logging
 import asyncio
+import random
 import time
-from typing import Dict, List, Any, Optional, Callable, Awaitable
+from typing import Dict, Any, Optional, Callable, Awaitable
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 from enum import Enum
+from collections import deque
 import functools
 
 logger = logging.getLogger(__name__)
@@ -22,6 +24,12 @@ class CircuitState(Enum):
     HALF_OPEN = "half_open"  # Testing if recovered
 
 
+# Module-level aliases: hot paths compare states by identity without a class lookup
+_CLOSED = CircuitState.CLOSED
+_OPEN = CircuitState.OPEN
+_HALF_OPEN = CircuitState.HALF_OPEN
+
+
 @dataclass
 class CircuitBreakerConfig:
     """Configuration for circuit breaker"""
@@ -36,88 +44,122 @@ class CircuitBreaker:
     Circuit breaker pattern implementation for fault tolerance
     """
     
+    __slots__ = (
+        'name', 'config', 'state', 'failure_count', 'success_count', 'last_failure_time',
+        'last_state_change', 'failure_history', '_state_lock', '_status'
+    )
+    
     def __init__(self, name: str, config: CircuitBreakerConfig = None):
         self.name = name
         self.config = config or CircuitBreakerConfig()
-        self.state = CircuitState.CLOSED
+        self.state = _CLOSED
         self.failure_count = 0
         self.success_count = 0
-        self.last_failure_time: Optional[datetime] = None
-        self.last_state_change: datetime = datetime.utcnow()
-        self.failure_history: List[datetime] = []
+        self.last_failure_time: Optional[float] = None  # time.monotonic()
+        self.last_state_change: float = time.monotonic()
+        # Only the newest failure_threshold failures can matter for tripping the circuit
+        self.failure_history: deque = deque(maxlen=self.config.failure_threshold)
+        # Serializes state transitions; the protected call itself runs outside the lock
+        self._state_lock = asyncio.Lock()
+        # Reused by get_status so scrapes do not allocate a new dict
+        self._status: Dict[str, Any] = {'name': name}
         
         logger.info(f"Circuit breaker '{name}' initialized")
     
     async def call(self, func: Callable[..., Awaitable], *args, **kwargs):
         """Execute function with circuit breaker protection"""
         
-        # Check if circuit is open
-        if self.state == CircuitState.OPEN:
-            # Check if timeout has passed
-            if datetime.utcnow() - self.last_state_change > timedelta(seconds=self.config.timeout_seconds):
-                logger.info(f"Circuit '{self.name}' transitioning to HALF_OPEN")
-                self.state = CircuitState.HALF_OPEN
-                self.success_count = 0
-            else:
-                raise Exception(f"Circuit breaker '{self.name}' is OPEN")
+        lock = self._state_lock
+        
+        # Only an open circuit needs the lock before the call
+        if self.state is _OPEN:
+            async with lock:
+                # Check if timeout has passed
+                if self.state is _OPEN:
+                    if time.monotonic() - self.last_state_change > self.config.timeout_seconds:
+                        logger.info(f"Circuit '{self.name}' transitioning to HALF_OPEN")
+                        self.state = _HALF_OPEN
+                        self.success_count = 0
+                    else:
+                        raise Exception(f"Circuit breaker '{self.name}' is OPEN")
         
         # Try to execute function
         try:
             result = await func(*args, **kwargs)
-            self._on_success()
-            return result
-        except Exception as e:
-            self._on_failure()
+        except Exception:
+            async with lock:
+                self._on_failure()
             raise
+        
+        # A success with no failures counted and no probe in progress changes nothing
+        if self.failure_count or self.state is _HALF_OPEN:
+            async with lock:
+                self._on_success()
+        return result
     
     def _on_success(self):
         """Handle successful execution"""
-        if self.state == CircuitState.HALF_OPEN:
+        if self.state is _HALF_OPEN:
             self.success_count += 1
-            logger.info(f"Circuit '{self.name}' success in HALF_OPEN ({self.success_count}/{self.config.success_threshold})")
+            threshold = self.config.success_threshold
+            logger.info(f"Circuit '{self.name}' success in HALF_OPEN ({self.success_count}/{threshold})")
             
-            if self.success_count >= self.config.success_threshold:
+            if self.success_count >= threshold:
                 logger.info(f"Circuit '{self.name}' transitioning to CLOSED")
-                self.state = CircuitState.CLOSED
+                self.state = _CLOSED
                 self.failure_count = 0
                 self.success_count = 0
-                self.last_state_change = datetime.utcnow()
+                self.last_state_change = time.monotonic()
         else:
             # Reset failure count on success in CLOSED state
             self.failure_count = 0
     
     def _on_failure(self):
         """Handle failed execution"""
-        self.last_failure_time = datetime.utcnow()
-        self.failure_history.append(self.last_failure_time)
-        
-        # Clean old failures outside window
-        cutoff = datetime.utcnow() - timedelta(seconds=self.config.window_seconds)
-        self.failure_history = [f for f in self.failure_history if f > cutoff]
+        now = time.monotonic()
+        history = self.failure_history
+        self.last_failure_time = now
+        history.append(now)
+        self._expire_failures(now)
         
-        if self.state == CircuitState.HALF_OPEN:
+        state = self.state
+        if state is _HALF_OPEN:
             logger.warning(f"Circuit '{self.name}' failure in HALF_OPEN, opening circuit")
-            self.state = CircuitState.OPEN
-            self.last_state_change = datetime.utcnow()
+            self.state = _OPEN
+            self.last_state_change = now
         
-        elif self.state == CircuitState.CLOSED:
-            self.failure_count = len(self.failure_history)
+        elif state is _CLOSED:
+            failure_count = self.failure_count = len(history)
             
-            if self.failure_count >= self.config.failure_threshold:
+            if failure_count >= self.config.failure_threshold:
                 logger.warning(f"Circuit '{self.name}' threshold exceeded, opening circuit")
-                self.state = CircuitState.OPEN
-                self.last_state_change = datetime.utcnow()
+                self.state = _OPEN
+                self.last_state_change = now
+    
+    def _expire_failures(self, now: float):
+        """Drop failures that have left the rolling window, oldest first"""
+        history = self.failure_history
+        cutoff = now - self.config.window_seconds
+        while history and history[0] <= cutoff:
+            history.popleft()
     
     def get_status(self) -> Dict[str, Any]:
-        """Get circuit breaker status"""
-        return {
-            'name': self.name,
-            'state': self.state.value,
-            'failure_count': len(self.failure_history),
-            'success_count': self.success_count,
-            'last_failure': self.last_failure_time.isoformat() if self.last_failure_time else None,
-            'last_state_change': self.last_state_change.isoformat()
-        }
+        """Get circuit breaker status; the returned dict is refreshed in place on each call"""
+        self._expire_failures(time.monotonic())
+        status = self._status
+        status['state'] = self.state.value
+        status['failure_count'] = len(self.failure_history)
+        status['success_count'] = self.success_count
+        status['last_failure'] = (
+            _monotonic_isoformat(self.last_failure_time) if self.last_failure_time else None
+        )
+        status['last_state_change'] = _monotonic_isoformat(self.last_state_change)
+        return status
+
+
+def _monotonic_isoformat(timestamp: float) -> str:
+    """Format a time.monotonic() reading as a UTC wall-clock ISO string"""
+    return datetime.fromtimestamp(time.time() - (time.monotonic() - timestamp), timezone.utc).isoformat()
 
 
 class RetryPolicy:
@@ -125,6 +167,10 @@ class RetryPolicy:
     Configurable retry policy with exponential backoff
     """
     
+    __slots__ = (
+        'max_attempts', 'initial_delay', 'max_delay', 'backoff_factor', 'jitter', '_base', '_status'
+    )
+    
     def __init__(
         self,
         max_attempts: int = 3,
@@ -138,16 +184,43 @@ class RetryPolicy:
         self.max_delay = max_delay
         self.backoff_factor = backoff_factor
         self.jitter = jitter
+        # Capped exponential schedule, indexed by attempt
+        self._base = [
+            min(initial_delay * (backoff_factor ** attempt), max_delay)
+            for attempt in range(max_attempts)
+        ]
+        self._status: Dict[str, Any] = {
+            'max_attempts': max_attempts,
+            'initial_delay': initial_delay,
+            'max_delay': max_delay
+        }
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get retry policy settings"""
+        return self._status
     
-    def get_delay(self, attempt: int) -> float:
-        """Calculate delay for retry attempt"""
-        delay = min(self.initial_delay * (self.backoff_factor ** attempt), self.max_delay)
+    def get_delay(self, attempt: int, prev: float = 0.0) -> float:
+        """
+        Calculate delay for retry attempt
+        
+        Args:
+            attempt: Zero-based number of the attempt that just failed
+            prev: Delay used before the previous attempt, for decorrelated jitter
+        
+        Returns:
+            Seconds to wait before the next attempt
+        """
+        if attempt < len(self._base):
+            base = self._base[attempt]
+        else:
+            base = min(self.initial_delay * (self.backoff_factor ** attempt), self.max_delay)
         
         if self.jitter:
-            import random
-            delay = delay * (0.5 + random.random())  # Add 0-50% jitter
+            # Decorrelated jitter: spread retries between the initial delay and
+            # three times the previous one, so callers do not retry in lockstep
+            return min(self.max_delay, random.uniform(self.initial_delay, max(base, prev * 3)))
         
-        return delay
+        return base
     
     async def execute(
         self,
@@ -157,6 +230,7 @@ class RetryPolicy:
     ):
         """Execute function with retry logic"""
         last_exception = None
+        delay = 0.0
         
         for attempt in range(self.max_attempts):
             try:
@@ -169,7 +243,7 @@ class RetryPolicy:
                 last_exception = e
                 
                 if attempt < self.max_attempts - 1:
-                    delay = self.get_delay(attempt)
+                    delay = self.get_delay(attempt, delay)
                     logger.warning(f"Attempt {attempt + 1} failed: {e}. Retrying in {delay:.2f}s...")
                     await asyncio.sleep(delay)
                 else:
@@ -183,53 +257,100 @@ class Bulkhead:
     Bulkhead pattern to isolate resources and prevent cascade failures
     """
     
+    __slots__ = (
+        'name', 'max_concurrent', 'max_queued', '_cond', '_resize_task', '_queue',
+        'active_count', 'total_processed', 'total_rejected', '_status'
+    )
+    
     def __init__(self, name: str, max_concurrent: int = 10, max_queued: int = 100):
         self.name = name
         self.max_concurrent = max_concurrent
         self.max_queued = max_queued
-        self.semaphore = asyncio.Semaphore(max_concurrent)
+        # Active calls are counted under a condition so the limit can change at runtime
+        self._cond = asyncio.Condition()
+        self._resize_task: Optional[asyncio.Task] = None
+        # Waiting room: one token per call waiting for an execution slot
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
         self.active_count = 0
-        self.queued_count = 0
         self.total_processed = 0
         self.total_rejected = 0
+        # Reused by get_status so scrapes do not allocate a new dict
+        self._status: Dict[str, Any] = {
+            'name': name, 'active': 0, 'queued': 0, 'max_concurrent': max_concurrent,
+            'max_queued': max_queued, 'total_processed': 0, 'total_rejected': 0, 'utilization': 0.0
+        }
+
+    @property
+    def queued_count(self) -> int:
+        """Number of calls waiting for an execution slot"""
+        return self._queue.qsize()
     
     async def execute(self, func: Callable[..., Awaitable], *args, **kwargs):
         """Execute function with bulkhead protection"""
         
-        # Check if queue is full
-        if self.queued_count >= self.max_queued:
+        queue = self._queue
+        cond = self._cond
+        
+        # Take a place in the waiting room, or reject if it is full
+        try:
+            queue.put_nowait(None)
+        except asyncio.QueueFull:
             self.total_rejected += 1
             raise Exception(f"Bulkhead '{self.name}' queue is full")
         
-        self.queued_count += 1
-        
         try:
-            async with self.semaphore:
+            async with cond:
+                if self.active_count >= self.max_concurrent:
+                    try:
+                        await cond.wait_for(self._has_capacity)
+                    except asyncio.CancelledError:
+                        # The lock is held again here; pass on a wake-up this waiter may have consumed
+                        cond.notify(1)
+                        raise
                 self.active_count += 1
-                self.queued_count -= 1
-                
-                try:
-                    result = await func(*args, **kwargs)
-                    self.total_processed += 1
-                    return result
-                finally:
-                    self.active_count -= 1
-        except Exception as e:
-            self.queued_count -= 1
-            raise
+        finally:
+            # Leave the waiting room whether a slot was acquired or the wait was cancelled
+            queue.get_nowait()
+        
+        try:
+            result = await func(*args, **kwargs)
+            self.total_processed += 1
+            return result
+        finally:
+            # Shielded so cancelling this call cannot skip waking the next waiter
+            await asyncio.shield(self._release())
+
+    async def _release(self):
+        """Free an execution slot and wake one waiting call"""
+        async with self._cond:
+            self.active_count -= 1
+            self._cond.notify(1)
+
+    def _has_capacity(self) -> bool:
+        return self.active_count < self.max_concurrent
+
+    async def resize(self, new_max: int):
+        """
+        Change the concurrency limit without disturbing in-flight calls
+
+        Args:
+            new_max: New maximum number of concurrent calls
+        """
+        async with self._cond:
+            self.max_concurrent = new_max
+            self._cond.notify_all()
+        logger.info(f"Bulkhead '{self.name}' resized to {new_max} concurrent calls")
     
     def get_status(self) -> Dict[str, Any]:
-        """Get bulkhead status"""
-        return {
-            'name': self.name,
-            'active': self.active_count,
-            'queued': self.queued_count,
-            'max_concurrent': self.max_concurrent,
-            'max_queued': self.max_queued,
-            'total_processed': self.total_processed,
-            'total_rejected': self.total_rejected,
-            'utilization': self.active_count / self.max_concurrent
-        }
+        """Get bulkhead status; the returned dict is refreshed in place on each call"""
+        status = self._status
+        status['active'] = self.active_count
+        status['queued'] = self.queued_count
+        status['max_concurrent'] = self.max_concurrent
+        status['total_processed'] = self.total_processed
+        status['total_rejected'] = self.total_rejected
+        status['utilization'] = self.active_count / self.max_concurrent
+        return status
 
 
 class ResilienceManager:
@@ -242,6 +363,8 @@ class ResilienceManager:
         self.circuit_breakers: Dict[str, CircuitBreaker] = {}
         self.bulkheads: Dict[str, Bulkhead] = {}
         self.retry_policies: Dict[str, RetryPolicy] = {}
+        # (circuit breaker, bulkhead, retry policy) names -> resolved pattern objects
+        self._pattern_cache: Dict[tuple, tuple] = {}
         
         # Initialize default resilience patterns
         self._initialize_defaults()
@@ -281,11 +404,20 @@ class ResilienceManager:
             self.circuit_breakers[name] = CircuitBreaker(name)
         return self.circuit_breakers[name]
     
-    def get_bulkhead(self, name: str, max_concurrent: int = 10) -> Bulkhead:
-        """Get or create bulkhead"""
-        if name not in self.bulkheads:
-            self.bulkheads[name] = Bulkhead(name, max_concurrent=max_concurrent)
-        return self.bulkheads[name]
+    def get_bulkhead(self, name: str, max_concurrent: Optional[int] = None) -> Bulkhead:
+        """Get or create bulkhead, resizing an existing one if a new limit is given"""
+        bulkhead = self.bulkheads.get(name)
+        if bulkhead is None:
+            bulkhead = self.bulkheads[name] = Bulkhead(name, max_concurrent=max_concurrent or 10)
+        elif max_concurrent is not None and max_concurrent != bulkhead.max_concurrent:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # No waiters can exist outside a running loop
+                bulkhead.max_concurrent = max_concurrent
+            else:
+                bulkhead._resize_task = loop.create_task(bulkhead.resize(max_concurrent))
+        return bulkhead
     
     def get_retry_policy(self, name: str) -> RetryPolicy:
         """Get or create retry policy"""
@@ -306,35 +438,27 @@ class ResilienceManager:
         Execute function with full resilience patterns
         """
         
-        # Wrap function with selected patterns
-        wrapped_func = func
-        
-        # Apply retry policy
-        if retry_policy:
-            policy = self.get_retry_policy(retry_policy)
-            original_func = wrapped_func
-            wrapped_func = lambda: policy.execute(original_func, *args, **kwargs)
-            args = ()
-            kwargs = {}
-        
-        # Apply circuit breaker
-        if circuit_breaker:
-            cb = self.get_circuit_breaker(circuit_breaker)
-            original_func = wrapped_func
-            wrapped_func = lambda: cb.call(original_func, *args, **kwargs)
-            args = ()
-            kwargs = {}
+        names = (circuit_breaker, bulkhead, retry_policy)
+        patterns = self._pattern_cache.get(names)
+        if patterns is None:
+            patterns = self._pattern_cache[names] = (
+                self.get_circuit_breaker(circuit_breaker) if circuit_breaker else None,
+                self.get_bulkhead(bulkhead) if bulkhead else None,
+                self.get_retry_policy(retry_policy) if retry_policy else None
+            )
+        cb, bh, policy = patterns
         
-        # Apply bulkhead
-        if bulkhead:
-            bh = self.get_bulkhead(bulkhead)
-            original_func = wrapped_func
-            wrapped_func = lambda: bh.execute(original_func, *args, **kwargs)
-            args = ()
-            kwargs = {}
+        # Bind the arguments once; each pattern then wraps a zero-argument callable
+        call = functools.partial(func, *args, **kwargs)
+        if policy is not None:
+            call = functools.partial(policy.execute, call)
+        if cb is not None:
+            call = functools.partial(cb.call, call)
+        if bh is not None:
+            call = functools.partial(bh.execute, call)
         
         # Execute with all patterns applied
-        return await wrapped_func()
+        return await call()
     
     def get_resilience_report(self) -> Dict[str, Any]:
         """Generate comprehensive resilience report"""
@@ -348,11 +472,7 @@ class ResilienceManager:
                 for name, bh in self.bulkheads.items()
             },
             'retry_policies': {
-                name: {
-                    'max_attempts': rp.max_attempts,
-                    'initial_delay': rp.initial_delay,
-                    'max_delay': rp.max_delay
-                }
+                name: rp.get_status()
                 for name, rp in self.retry_policies.items()
             }
         }
@@ -6,15 +6,21 @@ Monitors agent health, detects failures, and autonomously repairs issues
 import logging
 import traceback
 import asyncio
+from collections import deque
+from itertools import islice
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 import json
+import numpy as np
 import psutil
 import sys
 
 logger = logging.getLogger(__name__)
 
+# Number of recent values per metric examined for degrading trends
+TREND_WINDOW = 5
+
 
 @dataclass
 class HealthMetric:
@@ -47,7 +53,10 @@ class SelfHealer:
 
     def __init__(self, agent_ref):
         self.agent = agent_ref
-        self.health_metrics: List[HealthMetric] = []
+        self.health_metrics: deque = deque(maxlen=1000)
+        # Recent values per metric and whether a rise (+1) or fall (-1) is bad
+        self._metric_windows: Dict[str, deque] = {}
+        self._metric_direction: Dict[str, int] = {}
         self.failure_history: List[Failure] = []
         self.monitoring_active = False
         self.healing_strategies = self._load_healing_strategies()
@@ -122,6 +131,8 @@ class SelfHealer:
                 ))
 
         self.health_metrics.extend(metrics)
+        for metric in metrics:
+            self._track_metric(metric)
 
         # Trigger healing if critical issues found
         critical_metrics = [m for m in metrics if m.status == 'critical']
@@ -255,10 +266,10 @@ class SelfHealer:
         logger.info("Healing memory issue - clearing caches and optimizing")
 
         # Clear agent memory/cache
-        if hasattr(self.agent, 'memory'):
+        if hasattr(self.agent, 'trim_memory'):
             memory_size = len(self.agent.memory)
             # Keep only recent 50 items
-            self.agent.memory = self.agent.memory[-50:]
+            self.agent.trim_memory(50)
             logger.info(f"Cleared memory: {memory_size} -> {len(self.agent.memory)}")
 
         # Force garbage collection
@@ -412,51 +423,49 @@ class SelfHealer:
 
         logger.info(f"Learned: {json.dumps(learning_data, indent=2)}")
     
+    def _track_metric(self, metric: HealthMetric):
+        """Append a metric value to its trend window"""
+        window = self._metric_windows.get(metric.metric_name)
+        if window is None:
+            name = metric.metric_name
+            window = self._metric_windows[name] = deque(maxlen=TREND_WINDOW)
+            # Higher is worse for resource usage, lower is worse for health
+            if 'cpu' in name or 'memory' in name:
+                self._metric_direction[name] = 1
+            elif 'health' in name:
+                self._metric_direction[name] = -1
+            else:
+                self._metric_direction[name] = 0
+        window.append(metric.value)
+
     async def predict_failures(self) -> List[Dict[str, Any]]:
         """Predict potential failures based on health trends"""
         predictions = []
-        
-        if len(self.health_metrics) < 20:
+
+        # Only metrics with a full window and a known bad direction can trend
+        names = [
+            name for name, window in self._metric_windows.items()
+            if len(window) == TREND_WINDOW and self._metric_direction[name]
+        ]
+        if not names:
             return predictions
-        
-        # Analyze trends in health metrics
-        recent_metrics = self.health_metrics[-20:]
-        metric_types = set(m.metric_name for m in recent_metrics)
-        
-        for metric_type in metric_types:
-            type_metrics = [m for m in recent_metrics if m.metric_name == metric_type]
-            
-            if len(type_metrics) >= 5:
-                # Check for degrading trend
-                values = [m.value for m in type_metrics[-5:]]
-                if self._is_degrading_trend(values, metric_type):
-                    predictions.append({
-                        'metric': metric_type,
-                        'trend': 'degrading',
-                        'risk_level': 'high',
-                        'recommended_action': self._get_preventive_action(metric_type)
-                    })
-        
+
+        # Count steps moving in the bad direction for all metrics at once
+        values = np.array([self._metric_windows[name] for name in names], dtype=float)
+        direction = np.array([self._metric_direction[name] for name in names], dtype=float)
+        worsening = (np.diff(values, axis=1) * direction[:, None] > 0).sum(axis=1)
+
+        for idx in np.flatnonzero(worsening >= TREND_WINDOW - 2):
+            metric_type = names[idx]
+            predictions.append({
+                'metric': metric_type,
+                'trend': 'degrading',
+                'risk_level': 'high',
+                'recommended_action': self._get_preventive_action(metric_type)
+            })
+
         return predictions
     
-    def _is_degrading_trend(self, values: List[float], metric_type: str) -> bool:
-        """Check if metric values show degrading trend"""
-        if len(values) < 3:
-            return False
-        
-        # For metrics where higher is worse (cpu, memory)
-        if 'cpu' in metric_type or 'memory' in metric_type:
-            # Check if consistently increasing
-            increases = sum(1 for i in range(len(values)-1) if values[i+1] > values[i])
-            return increases >= len(values) - 2
-        
-        # For health metrics where lower is worse
-        elif 'health' in metric_type:
-            decreases = sum(1 for i in range(len(values)-1) if values[i+1] < values[i])
-            return decreases >= len(values) - 2
-        
-        return False
-    
     def _get_preventive_action(self, metric_type: str) -> str:
         """Get recommended preventive action for metric"""
         actions = {
@@ -471,7 +480,8 @@ class SelfHealer:
 
     def get_health_report(self) -> Dict:
         """Generate comprehensive health report"""
-        recent_metrics = self.health_metrics[-100:]  # Last 100 metrics
+        # Last 100 metrics
+        recent_metrics = list(islice(self.health_metrics, max(0, len(self.health_metrics) - 100), None))
 
         return {
             'current_status': self._calculate_overall_health(recent_metrics),
@@ -3,19 +3,127 @@ Self-Learning Module
 Continuously learns from experiences, optimizes strategies, and improves performance
 """
 
+import asyncio
+import functools
 import logging
+import os
+import re
+import time
 import numpy as np
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, field
-from datetime import datetime
+from typing import BinaryIO, Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, field, asdict, is_dataclass
+from datetime import datetime, timedelta, timezone
 import json
-from collections import defaultdict
-import pickle
+from collections import defaultdict, deque
+from itertools import islice
+from bisect import bisect_left, insort
 
-logger = logging.getLogger(__name__)
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+# Experience log writes between forced flushes to disk
+LOG_SYNC_INTERVAL = 50
+
+# Experience log writes between compactions into a new snapshot
+LOG_COMPACT_INTERVAL = 1000
+
+# Experience log records written per background flush
+LOG_BATCH_SIZE = 64
+
+# Most recent experiences kept in memory
+EXPERIENCE_CAPACITY = 10_000
+
+
+# Task keywords by bucket, in priority order. The lookahead reports overlapping
+# matches so every keyword occurrence is seen in a single scan.
+_TASK_KEYWORDS = {
+    'search_task': ['search', 'find', 'look up', 'research'],
+    'code_task': ['code', 'execute', 'run', 'program'],
+    'control_task': ['click', 'type', 'screenshot', 'control'],
+    'analysis_task': ['analyze', 'summarize', 'explain'],
+}
+_TASK_RANK = {f'g{rank}': rank for rank in range(len(_TASK_KEYWORDS))}
+_TASK_TYPES = list(_TASK_KEYWORDS)
+_CLASSIFIER_RE = re.compile(
+    '(?=' + '|'.join(
+        f"(?P<g{rank}>{'|'.join(map(re.escape, words))})"
+        for rank, words in enumerate(_TASK_KEYWORDS.values())
+    ) + ')',
+    re.IGNORECASE
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _classify_task(task_description: str) -> str:
+    """Classify task type from description by its highest-priority keyword"""
+    best = len(_TASK_TYPES)
+    for match in _CLASSIFIER_RE.finditer(task_description):
+        rank = _TASK_RANK[match.lastgroup]
+        if rank < best:
+            best = rank
+            if rank == 0:
+                break
+    return _TASK_TYPES[best] if best < len(_TASK_TYPES) else 'general_task'
+
+
+# Context keys reported as "key:value" features
+_CTX_KEYS = ('task_type', 'complexity')
+_MISSING = object()
+
+
+@functools.lru_cache(maxsize=1024, typed=True)
+def _context_features(task_type: Any, complexity: Any, resources: Tuple) -> Tuple[str, ...]:
+    """Build context features from the hashable parts of a context"""
+    features = [f"{key}:{value}" for key, value in zip(_CTX_KEYS, (task_type, complexity))
+                if value is not _MISSING]
+    features.extend(f"resource:{resource}" for resource in resources)
+    return tuple(features)
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, ties in original order"""
+    if len(scores) > k:
+        # Take everything above the k-th best score, then the earliest ties at it
+        threshold = np.partition(scores, -k)[-k]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+        idx = np.sort(np.concatenate((above, ties)))
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.argsort(-scores[idx], kind='stable')]
+
+
+def _utcnow() -> datetime:
+    """Current UTC time as a naive datetime, matching experience timestamps"""
+    return datetime.fromtimestamp(time.time(), timezone.utc).replace(tzinfo=None)
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize values the stdlib json encoder does not handle"""
+    if is_dataclass(obj):
+        return asdict(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _dump_line(record: Dict) -> bytes:
+    """Encode a record as one JSON line"""
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS, default=str) + b'\n'
+    return json.dumps(record, default=_json_default).encode() + b'\n'
+
+
+def _load_line(line: bytes) -> Dict:
+    """Decode one JSON line"""
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+@dataclass(slots=True)
 class Experience:
     """Learning experience record"""
     timestamp: datetime
@@ -28,6 +136,78 @@ class Experience:
     feedback: Optional[str] = None
 
 
+class PrioritizedReplayBuffer:
+    """
+    Fixed-capacity experience store with priority-proportional sampling,
+    backed by a sum-tree so add and sample are O(log N)
+    """
+
+    def __init__(self, capacity: int = 10000, alpha: float = 0.6, epsilon: float = 0.1):
+        self.capacity = capacity
+        self.alpha = alpha  # 0 = uniform sampling, 1 = fully proportional
+        self.epsilon = epsilon  # Keeps zero-priority experiences sampleable
+        self.tree = np.zeros(2 * capacity)
+        self.data: List[Optional[Experience]] = [None] * capacity
+        self.write = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def total(self) -> float:
+        """Sum of all stored priorities"""
+        return float(self.tree[1])
+
+    def add(self, priority: float, experience: Experience):
+        """Store an experience, overwriting the oldest one when full"""
+        idx = self.write
+        self.data[idx] = experience
+        self._update(idx, (abs(priority) + self.epsilon) ** self.alpha)
+        self.write = (idx + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _update(self, idx: int, priority: float):
+        """Set leaf priority and propagate the change to the root"""
+        pos = idx + self.capacity
+        change = priority - self.tree[pos]
+        while pos >= 1:
+            self.tree[pos] += change
+            pos //= 2
+
+    def _retrieve(self, value: float) -> int:
+        """Find the data index whose priority interval contains value"""
+        pos = 1
+        while pos < self.capacity:
+            left = 2 * pos
+            if value <= self.tree[left]:
+                pos = left
+            else:
+                value -= self.tree[left]
+                pos = left + 1
+        return pos - self.capacity
+
+    def sample(self, batch_size: int, beta: float = 1.0) -> Tuple[List[Experience], np.ndarray]:
+        """
+        Sample experiences proportionally to priority
+
+        Returns:
+            Sampled experiences and their normalized importance-sampling weights
+        """
+        total = self.total()
+        if self.size == 0 or total <= 0:
+            return [], np.zeros(0)
+
+        values = np.random.uniform(0, total, size=batch_size)
+        indices = [self._retrieve(v) for v in values]
+        indices = [i for i in indices if self.data[i] is not None]
+
+        probs = self.tree[np.array(indices, dtype=np.int64) + self.capacity] / total
+        weights = (self.size * probs) ** -beta
+        weights /= weights.max()
+
+        return [self.data[i] for i in indices], weights
+
+
 @dataclass
 class Knowledge:
     """Knowledge base entry"""
@@ -45,85 +225,365 @@ class SelfLearner:
     Self-learning system that improves agent performance over time
     """
 
-    def __init__(self, agent_ref, knowledge_base_path: str = 'knowledge_base.pkl'):
+    def __init__(self, agent_ref, knowledge_base_path: str = 'knowledge_base.json',
+                 experience_log_path: Optional[str] = None):
         self.agent = agent_ref
         self.knowledge_base_path = knowledge_base_path
-        self.experiences: List[Experience] = []
+        # Append-only log of changes made since the last knowledge base snapshot
+        self.experience_log_path = experience_log_path or (
+            os.path.splitext(knowledge_base_path)[0] + '.jsonl'
+        )
+        self.experiences: deque = deque(maxlen=EXPERIENCE_CAPACITY)
+        self.replay = PrioritizedReplayBuffer(capacity=EXPERIENCE_CAPACITY)
         self.knowledge_base: Dict[str, Knowledge] = {}
         self.strategy_performance: Dict[str, Dict] = defaultdict(lambda: {
             'attempts': 0,
             'successes': 0,
             'avg_duration': 0.0,
+            'timed_attempts': 0,
             'success_rate': 0.0
         })
 
+        # Running totals, so reports do not rescan the experiences
+        self._total_experiences = 0
+        self._total_success = 0
+
+        # Strategies ordered best first as (-success_rate, first seen, name),
+        # plus each strategy's current key so one update is a delete and an insert
+        self._strategy_order: List[Tuple[float, int, str]] = []
+        self._strategy_keys: Dict[str, Tuple[float, int, str]] = {}
+
+        # Strategy suggestions by task type, cleared whenever the knowledge they read changes
+        self._suggestions: Dict[str, Dict[str, Any]] = {}
+
+        # Knowledge entries changed since the last log write
+        self._dirty_knowledge: set = set()
+        self._log_writes = 0
+
+        # Encoded log records waiting for the background writer
+        self._log_queue: Optional[asyncio.Queue] = None
+        self._log_task: Optional[asyncio.Task] = None
+        self._log_taken = 0
+
+        # Experience log handle, opened on the first write
+        self._experience_log: Optional[BinaryIO] = None
+
         # Load existing knowledge
         self._load_knowledge_base()
+        for strategy in self.strategy_performance:
+            self._rank_strategy(strategy)
 
         logger.info("Self-Learner initialized")
 
     def _load_knowledge_base(self):
-        """Load knowledge base from disk"""
+        """Load the knowledge base snapshot and replay the experience log on top"""
+        migrated = False
         try:
             with open(self.knowledge_base_path, 'rb') as f:
-                data = pickle.load(f)
-                self.knowledge_base = data.get('knowledge_base', {})
-                self.strategy_performance = data.get('strategy_performance', defaultdict(dict))
-                logger.info(f"Loaded {len(self.knowledge_base)} knowledge entries")
+                data = _load_line(f.read())
+            for knowledge in data.get('knowledge_base', {}).values():
+                knowledge['timestamp'] = datetime.fromisoformat(knowledge['timestamp'])
+            self.knowledge_base = {
+                key: Knowledge(**knowledge) for key, knowledge in data.get('knowledge_base', {}).items()
+            }
+            self.strategy_performance.update(data.get('strategy_performance', {}))
+            logger.info(f"Loaded {len(self.knowledge_base)} knowledge entries")
         except FileNotFoundError:
-            logger.info("No existing knowledge base found, starting fresh")
+            migrated = self._load_legacy_knowledge_base()
+            if not migrated:
+                logger.info("No existing knowledge base found, starting fresh")
         except Exception as e:
             logger.error(f"Error loading knowledge base: {e}")
 
-    def _save_knowledge_base(self):
-        """Save knowledge base to disk"""
         try:
-            with open(self.knowledge_base_path, 'wb') as f:
-                pickle.dump({
-                    'knowledge_base': self.knowledge_base,
-                    'strategy_performance': dict(self.strategy_performance)
-                }, f)
+            with open(self.experience_log_path, 'rb') as f:
+                replayed = 0
+                for line in f:
+                    try:
+                        self._apply_log_record(_load_line(line))
+                        replayed += 1
+                    except Exception as e:
+                        # A torn final line from a crash is expected; skip it
+                        logger.warning(f"Skipping unreadable experience log record: {e}")
+                if replayed:
+                    logger.info(f"Replayed {replayed} experience log records")
+        except FileNotFoundError:
+            pass
+
+        if migrated:
+            # Write the JSON snapshot now so the legacy file is only read once
+            self._write_snapshot(self._encode_snapshot())
+            logger.info(f"Migrated legacy knowledge base to {self.knowledge_base_path}")
+
+    def _load_legacy_knowledge_base(self) -> bool:
+        """
+        Load a pickled knowledge base left by versions before the JSON snapshot
+
+        Returns:
+            True when a legacy knowledge base was found and loaded
+        """
+        legacy_path = os.path.splitext(self.knowledge_base_path)[0] + '.pkl'
+        if legacy_path == self.knowledge_base_path or not os.path.exists(legacy_path):
+            return False
+
+        logger.warning(f"Found legacy knowledge base {legacy_path}, migrating it to JSON")
+        try:
+            import pickle
+            with open(legacy_path, 'rb') as f:
+                data = pickle.load(f)
+            self.knowledge_base = dict(data.get('knowledge_base', {}))
+            self.strategy_performance.update(data.get('strategy_performance', {}))
+        except Exception as e:
+            logger.error(f"Error loading legacy knowledge base {legacy_path}, ignoring it: {e}")
+            return False
+
+        logger.info(f"Loaded {len(self.knowledge_base)} knowledge entries from {legacy_path}")
+        return True
+
+    def _apply_log_record(self, record: Dict):
+        """Apply one experience log record to in-memory state"""
+        exp = record.get('experience')
+        if exp is not None:
+            exp['timestamp'] = datetime.fromisoformat(exp['timestamp'])
+            experience = Experience(**exp)
+            self._count_experience(experience)
+            self.replay.add(0.0 if experience.outcome == 'success' else 1.0, experience)
+
+        for strategy, stats in record.get('strategy', {}).items():
+            self.strategy_performance[strategy] = stats
+
+        for key, knowledge in record.get('knowledge', {}).items():
+            knowledge['timestamp'] = datetime.fromisoformat(knowledge['timestamp'])
+            self.knowledge_base[key] = Knowledge(**knowledge)
+
+    def _count_experience(self, experience: Experience):
+        """Keep an experience in the recent window and update the running totals"""
+        self.experiences.append(experience)
+        self._total_experiences += 1
+        if experience.outcome == 'success':
+            self._total_success += 1
+
+    def _append_log(self, experience: Optional[Experience] = None):
+        """
+        Append an experience and the state it changed to the experience log
+
+        Args:
+            experience: Experience just recorded, if any
+        """
+        record: Dict[str, Any] = {
+            'knowledge': {k: self.knowledge_base[k] for k in self._dirty_knowledge}
+        }
+        if experience is not None:
+            record['experience'] = experience
+            record['strategy'] = {
+                experience.strategy_used: self.strategy_performance[experience.strategy_used]
+            }
+        self._dirty_knowledge.clear()
+
+        # Encode now, while the record still reflects the state it describes
+        try:
+            line = _dump_line(record)
+        except Exception as e:
+            logger.error(f"Error encoding experience log record: {e}")
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if self._write_log_batch([line]):
+                self._write_snapshot(self._encode_snapshot())
+            return
+
+        if self._log_queue is None:
+            self._log_queue = asyncio.Queue()
+        if self._log_task is None or self._log_task.done():
+            self._log_task = loop.create_task(self._drain_log())
+        self._log_queue.put_nowait(line)
+
+    async def _write_queued(self, batch: List[bytes]) -> bool:
+        """Top up a batch from the log queue and write it in a worker thread"""
+        queue = self._log_queue
+        try:
+            while len(batch) < LOG_BATCH_SIZE:
+                batch.append(queue.get_nowait())
+        except asyncio.QueueEmpty:
+            pass
+        self._log_taken += len(batch)
+        return await asyncio.to_thread(self._write_log_batch, batch)
+
+    async def _drain_log(self):
+        """Write queued log records in batches off the event loop"""
+        queue = self._log_queue
+        while True:
+            first = await queue.get()
+            self._log_taken = 0
+            try:
+                if await self._write_queued([first]):
+                    # Log what was queued meanwhile, so the snapshot supersedes every logged record
+                    while not queue.empty():
+                        await self._write_queued([])
+                    await self._save_knowledge_base()
+            finally:
+                # Mark records done only now, so flush_log also waits for a running compaction
+                for _ in range(self._log_taken or 1):
+                    queue.task_done()
+
+    def _write_log_batch(self, lines: List[bytes]) -> bool:
+        """
+        Append encoded records to the experience log
+
+        Returns:
+            True when the log has grown enough to be compacted
+        """
+        before = self._log_writes
+        self._log_writes += len(lines)
+        try:
+            if self._experience_log is None:
+                self._experience_log = open(self.experience_log_path, 'ab', buffering=1 << 20)
+            self._experience_log.write(b''.join(lines))
+            if self._log_writes // LOG_SYNC_INTERVAL != before // LOG_SYNC_INTERVAL:
+                self._experience_log.flush()
+                getattr(os, 'fdatasync', os.fsync)(self._experience_log.fileno())
+        except Exception as e:
+            logger.error(f"Error writing experience log: {e}")
+        return self._log_writes // LOG_COMPACT_INTERVAL != before // LOG_COMPACT_INTERVAL
+
+    async def flush_log(self):
+        """Wait until every queued experience log record has been written"""
+        if self._log_queue is not None and self._log_task is not None and not self._log_task.done():
+            await self._log_queue.join()
+
+    async def close(self):
+        """Write pending log records, save a final snapshot and close the experience log"""
+        await self.flush_log()
+        await self._save_knowledge_base()
+
+        if self._log_task is not None:
+            self._log_task.cancel()
+            await asyncio.gather(self._log_task, return_exceptions=True)
+            self._log_task = None
+
+        if self._experience_log is not None:
+            self._experience_log.close()
+            self._experience_log = None
+
+    def _set_knowledge(self, key: str, knowledge: Knowledge):
+        """Store a knowledge entry and mark it for the experience log"""
+        self.knowledge_base[key] = knowledge
+        self._dirty_knowledge.add(key)
+
+    def _encode_snapshot(self) -> Optional[bytes]:
+        """
+        Encode the knowledge base and strategy stats as one JSON document
+
+        Returns:
+            Encoded snapshot, or None if it could not be encoded
+        """
+        try:
+            data = _dump_line({
+                'knowledge_base': self.knowledge_base,
+                'strategy_performance': self.strategy_performance
+            })
+        except Exception as e:
+            logger.error(f"Error encoding knowledge base: {e}")
+            return None
+        self._dirty_knowledge.clear()
+        return data
+
+    def _write_snapshot(self, data: Optional[bytes]):
+        """Atomically replace the snapshot file and truncate the log it supersedes"""
+        if data is None:
+            # Encoding failed; keep the old snapshot and the log that extends it
+            return
+        try:
+            tmp_path = self.knowledge_base_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.knowledge_base_path)
+
+            # Everything in the log is now part of the snapshot
+            if self._experience_log is not None:
+                self._experience_log.flush()
+                self._experience_log.truncate(0)
+            elif os.path.exists(self.experience_log_path):
+                os.truncate(self.experience_log_path, 0)
             logger.info("Knowledge base saved")
         except Exception as e:
             logger.error(f"Error saving knowledge base: {e}")
 
-    async def record_experience(self, experience: Experience):
-        """Record a new learning experience"""
-        self.experiences.append(experience)
+    async def _save_knowledge_base(self):
+        """Compact the experience log into a fresh knowledge base snapshot"""
+        # Encode on the loop so the snapshot is consistent; only disk I/O is offloaded
+        data = self._encode_snapshot()
+        if data is not None:
+            await asyncio.to_thread(self._write_snapshot, data)
+
+    async def record_experience(self, experience: Experience, priority: Optional[float] = None):
+        """
+        Record a new learning experience
+
+        Args:
+            experience: Experience to record
+            priority: Replay priority; defaults to 1.0 for failures and 0.0 for successes
+        """
+        self._count_experience(experience)
+
+        if priority is None:
+            priority = 0.0 if experience.outcome == 'success' else 1.0
+        self.replay.add(priority, experience)
 
         # Update strategy performance
-        strategy = experience.strategy_used
-        self.strategy_performance[strategy]['attempts'] += 1
+        stats = self.strategy_performance[experience.strategy_used]
+        stats['attempts'] += 1
 
         if experience.outcome == 'success':
-            self.strategy_performance[strategy]['successes'] += 1
+            stats['successes'] += 1
+
+        stats['success_rate'] = stats['successes'] / stats['attempts']
+        self._rank_strategy(experience.strategy_used)
 
-        attempts = self.strategy_performance[strategy]['attempts']
-        successes = self.strategy_performance[strategy]['successes']
-        self.strategy_performance[strategy]['success_rate'] = successes / attempts
+        # Running mean of durations, over the experiences that reported one
+        duration = experience.performance_metrics.get('duration')
+        if duration is not None:
+            timed = stats['timed_attempts'] = stats.get('timed_attempts', 0) + 1
+            stats['avg_duration'] += (duration - stats['avg_duration']) / timed
 
         # Learn from experience
-        await self._learn_from_experience(experience)
+        self._learn_from_experience(experience)
+        self._append_log(experience)
 
         logger.info(f"Recorded experience: {experience.task_description[:50]}...")
 
-    async def _learn_from_experience(self, experience: Experience):
+    def _rank_strategy(self, strategy: str):
+        """Move a strategy to its place in the success-rate ordering"""
+        order = self._strategy_order
+        key = self._strategy_keys.get(strategy)
+        if key is not None:
+            del order[bisect_left(order, key)]
+            seen = key[1]
+        else:
+            seen = len(self._strategy_keys)
+        key = self._strategy_keys[strategy] = (
+            -self.strategy_performance[strategy]['success_rate'], seen, strategy
+        )
+        insort(order, key)
+
+    def _learn_from_experience(self, experience: Experience):
         """Extract learnings from an experience"""
         # Analyze what worked and what didn't
         if experience.outcome == 'success':
             # Extract successful patterns
-            await self._extract_success_patterns(experience)
+            self._extract_success_patterns(experience)
         else:
             # Learn from failures
-            await self._extract_failure_lessons(experience)
+            self._extract_failure_lessons(experience)
 
         # Update knowledge base
-        await self._update_knowledge(experience)
+        self._update_knowledge(experience)
 
         # Optimize strategies
-        await self._optimize_strategies()
+        self._optimize_strategies()
 
-    async def _extract_success_patterns(self, experience: Experience):
+    def _extract_success_patterns(self, experience: Experience):
         """Extract patterns from successful experiences"""
         logger.info("Extracting success patterns")
 
@@ -137,21 +597,22 @@ class SelfLearner:
         # Store as knowledge
         knowledge_key = f"success_pattern_{experience.strategy_used}"
         if knowledge_key not in self.knowledge_base:
-            self.knowledge_base[knowledge_key] = Knowledge(
+            self._set_knowledge(knowledge_key, Knowledge(
                 topic=knowledge_key,
                 content=success_factors,
                 confidence=0.7,
                 source='experience',
                 timestamp=experience.timestamp
-            )
+            ))
         else:
             # Update existing knowledge with reinforcement
             existing = self.knowledge_base[knowledge_key]
             existing.usage_count += 1
             existing.confidence = min(0.99, existing.confidence * 1.1)
             existing.timestamp = experience.timestamp
+            self._dirty_knowledge.add(knowledge_key)
 
-    async def _extract_failure_lessons(self, experience: Experience):
+    def _extract_failure_lessons(self, experience: Experience):
         """Extract lessons from failures"""
         logger.info("Extracting failure lessons")
 
@@ -165,29 +626,26 @@ class SelfLearner:
         # Store as anti-pattern
         knowledge_key = f"failure_lesson_{experience.strategy_used}"
         if knowledge_key not in self.knowledge_base:
-            self.knowledge_base[knowledge_key] = Knowledge(
+            self._set_knowledge(knowledge_key, Knowledge(
                 topic=knowledge_key,
                 content=failure_lesson,
                 confidence=0.8,
                 source='failure_experience',
                 timestamp=experience.timestamp
-            )
+            ))
 
     def _extract_context_features(self, context: Dict) -> List[str]:
         """Extract key features from context"""
-        features = []
-
-        if 'task_type' in context:
-            features.append(f"task_type:{context['task_type']}")
-        if 'complexity' in context:
-            features.append(f"complexity:{context['complexity']}")
-        if 'resources' in context:
-            for resource in context['resources']:
-                features.append(f"resource:{resource}")
-
-        return features
+        task_type = context.get('task_type', _MISSING)
+        complexity = context.get('complexity', _MISSING)
+        resources = tuple(context.get('resources', ()))
+        try:
+            return list(_context_features(task_type, complexity, resources))
+        except TypeError:
+            # Unhashable values cannot be memoized
+            return list(_context_features.__wrapped__(task_type, complexity, resources))
 
-    async def _update_knowledge(self, experience: Experience):
+    def _update_knowledge(self, experience: Experience):
         """Update knowledge base with new information"""
         # Extract key information from the experience
         task_type = self._classify_task(experience.task_description)
@@ -212,8 +670,9 @@ class SelfLearner:
                 existing.success_rate = (existing.success_rate * (existing.usage_count - 1)) / existing.usage_count
 
             existing.confidence = min(0.99, existing.confidence + 0.05)
+            self._dirty_knowledge.add(knowledge_key)
         else:
-            self.knowledge_base[knowledge_key] = Knowledge(
+            self._set_knowledge(knowledge_key, Knowledge(
                 topic=knowledge_key,
                 content=solution_data,
                 confidence=0.5,
@@ -221,51 +680,78 @@ class SelfLearner:
                 timestamp=experience.timestamp,
                 usage_count=1,
                 success_rate=1.0 if experience.outcome == 'success' else 0.0
-            )
-
-        # Periodically save knowledge base
-        if len(self.experiences) % 10 == 0:
-            self._save_knowledge_base()
+            ))
 
     def _classify_task(self, task_description: str) -> str:
         """Classify task type from description"""
-        desc_lower = task_description.lower()
-
-        if any(word in desc_lower for word in ['search', 'find', 'look up', 'research']):
-            return 'search_task'
-        elif any(word in desc_lower for word in ['code', 'execute', 'run', 'program']):
-            return 'code_task'
-        elif any(word in desc_lower for word in ['click', 'type', 'screenshot', 'control']):
-            return 'control_task'
-        elif any(word in desc_lower for word in ['analyze', 'summarize', 'explain']):
-            return 'analysis_task'
-        else:
-            return 'general_task'
+        return _classify_task(task_description)
 
-    async def _optimize_strategies(self):
-        """Optimize strategies based on performance data"""
+    def _optimize_strategies(self, replay_sample: Optional[Tuple[List[Experience], np.ndarray]] = None):
+        """
+        Optimize strategies based on performance data
+
+        Args:
+            replay_sample: Optional (experiences, weights) drawn from the replay
+                buffer; success rates are then estimated from the
+                importance-weighted sample instead of the running totals
+        """
         logger.info("Optimizing strategies")
 
-        # Identify best performing strategies
-        best_strategies = sorted(
-            self.strategy_performance.items(),
-            key=lambda x: x[1]['success_rate'],
-            reverse=True
-        )[:5]
+        if replay_sample and len(replay_sample[0]):
+            experiences, weights = replay_sample
+            weighted = defaultdict(lambda: [0.0, 0.0])
+            for exp, weight in zip(experiences, weights):
+                totals = weighted[exp.strategy_used]
+                totals[0] += weight
+                if exp.outcome == 'success':
+                    totals[1] += weight
+
+            performance = {
+                strategy: {
+                    'attempts': self.strategy_performance.get(strategy, {}).get('attempts', 0),
+                    'success_rate': float(successes / total)
+                }
+                for strategy, (total, successes) in weighted.items()
+            }
+
+            # Identify best performing strategies
+            best_strategies = sorted(
+                performance.items(),
+                key=lambda x: x[1]['success_rate'],
+                reverse=True
+            )[:5]
+        else:
+            # The running ordering is kept up to date by record_experience
+            best_strategies = [
+                (strategy, self.strategy_performance[strategy])
+                for _, _, strategy in self._strategy_order[:5]
+            ]
 
         # Store optimized strategy preferences
-        self.knowledge_base['optimized_strategies'] = Knowledge(
+        self._set_knowledge('optimized_strategies', Knowledge(
             topic='optimized_strategies',
             content={'best_strategies': best_strategies},
             confidence=0.9,
             source='optimization',
-            timestamp=datetime.utcnow()
-        )
+            timestamp=_utcnow()
+        ))
+        self._suggestions.clear()
 
     async def suggest_strategy(self, task_description: str, context: Dict) -> Dict[str, Any]:
-        """Suggest best strategy based on learned knowledge"""
+        """
+        Suggest best strategy based on learned knowledge
+
+        Suggestions are cached per task type until the next experience or
+        self-teaching changes the knowledge base; treat the result as read-only.
+        """
         task_type = self._classify_task(task_description)
+        suggestion = self._suggestions.get(task_type)
+        if suggestion is None:
+            suggestion = self._suggestions[task_type] = self._suggest_for_type(task_type)
+        return suggestion
 
+    def _suggest_for_type(self, task_type: str) -> Dict[str, Any]:
+        """Look up the best known strategy for a task type"""
         # Look up learned knowledge
         knowledge_key = f"task_solution_{task_type}"
         if knowledge_key in self.knowledge_base:
@@ -300,20 +786,25 @@ class SelfLearner:
         """Teach the agent new knowledge"""
         logger.info(f"Self-teaching: {topic}")
 
-        self.knowledge_base[topic] = Knowledge(
+        self._set_knowledge(topic, Knowledge(
             topic=topic,
             content=content,
             confidence=0.6,
             source=source,
-            timestamp=datetime.utcnow()
-        )
-
-        self._save_knowledge_base()
+            timestamp=_utcnow()
+        ))
+        self._suggestions.clear()
+        self._append_log()
 
     def get_learning_report(self) -> Dict:
         """Generate learning progress report"""
-        total_experiences = len(self.experiences)
-        successful_experiences = sum(1 for e in self.experiences if e.outcome == 'success')
+        total_experiences = self._total_experiences
+        successful_experiences = self._total_success
+
+        knowledge = list(self.knowledge_base.items())
+        knowledge_scores = np.fromiter(
+            (v.confidence * v.usage_count for _, v in knowledge), dtype=np.float64, count=len(knowledge)
+        )
 
         return {
             'total_experiences': total_experiences,
@@ -322,14 +813,10 @@ class SelfLearner:
             'knowledge_base_size': len(self.knowledge_base),
             'strategy_performance': {
                 k: {
-                    'attempts': v['attempts'],
-                    'success_rate': v['success_rate']
+                    'attempts': self.strategy_performance[k]['attempts'],
+                    'success_rate': self.strategy_performance[k]['success_rate']
                 }
-                for k, v in sorted(
-                    self.strategy_performance.items(),
-                    key=lambda x: x[1]['success_rate'],
-                    reverse=True
-                )[:10]
+                for _, _, k in self._strategy_order[:10]
             },
             'top_knowledge': [
                 {
@@ -338,11 +825,7 @@ class SelfLearner:
                     'usage_count': v.usage_count,
                     'success_rate': v.success_rate
                 }
-                for k, v in sorted(
-                    self.knowledge_base.items(),
-                    key=lambda x: x[1].confidence * x[1].usage_count,
-                    reverse=True
-                )[:10]
+                for k, v in (knowledge[i] for i in _top_k_indices(knowledge_scores, 10))
             ]
         }
     
@@ -352,7 +835,7 @@ class SelfLearner:
             return 0.1  # High learning rate initially
         
         recent_successes = sum(
-            1 for e in self.experiences[-20:] 
+            1 for e in islice(reversed(self.experiences), 20)
             if e.outcome == 'success'
         )
         recent_success_rate = recent_successes / min(20, len(self.experiences))
@@ -409,7 +892,7 @@ class SelfLearner:
         # Check overall performance
         if len(self.experiences) > 20:
             recent_success_rate = sum(
-                1 for e in self.experiences[-20:] 
+                1 for e in islice(reversed(self.experiences), 20)
                 if e.outcome == 'success'
             ) / 20
             
@@ -428,16 +911,14 @@ class SelfLearner:
                 'recommendation': 'Explore more diverse problem-solving approaches'
             })
         
-        # Check for knowledge staleness
-        stale_knowledge = [
-            k for k, v in self.knowledge_base.items()
-            if (datetime.utcnow() - v.timestamp).days > 30
-        ]
+        # Check for knowledge staleness (more than 30 whole days old)
+        cutoff = _utcnow() - timedelta(days=31)
+        stale_knowledge = sum(1 for v in self.knowledge_base.values() if v.timestamp <= cutoff)
         
-        if len(stale_knowledge) > len(self.knowledge_base) * 0.5:
+        if stale_knowledge > len(self.knowledge_base) * 0.5:
             recommendations.append({
                 'area': 'Knowledge Freshness',
-                'issue': f'{len(stale_knowledge)} knowledge entries older than 30 days',
+                'issue': f'{stale_knowledge} knowledge entries older than 30 days',
                 'recommendation': 'Validate and refresh outdated knowledge'
             })
         
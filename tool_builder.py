@@ -33,6 +33,9 @@ class ToolBuilder:
         self.built_tools: Dict[str, Callable] = {}
         self.tool_registry: Dict[str, ToolSpec] = {}
 
+        # Bumped whenever the set of built tools changes
+        self.generation = 0
+
         logger.info("Tool Builder initialized")
 
     async def identify_needed_tool(self, task: str, current_capabilities: List[str]) -> Optional[ToolSpec]:
@@ -89,6 +92,7 @@ class ToolBuilder:
             if tool_func:
                 self.built_tools[spec.name] = tool_func
                 self.tool_registry[spec.name] = spec
+                self.generation += 1
                 logger.info(f"Successfully built and integrated tool: {spec.name}")
                 return tool_func
 
@@ -195,6 +199,6 @@ class ToolBuilder:
         Provide 3-5 specific improvement suggestions:"""
 
         response = await self.agent.llm.query(prompt)
-        improvements = [line.strip() for line in response.split('\n') if line.strip()]
+        improvements = [line for line in map(str.strip, response.splitlines()) if line]
 
         return improvements
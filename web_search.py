@@ -4,13 +4,102 @@ Provides web search capabilities using multiple search engines
 """
 
 import aiohttp
+import asyncio
+import copy
 import logging
-from typing import Dict, List, Any
+import time
+from typing import Dict, List, Any, Optional, Tuple
 from bs4 import BeautifulSoup
 import json
 
+try:
+    import h2  # noqa: F401  (required by httpx for HTTP/2)
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import aiodns  # noqa: F401  (backs aiohttp.AsyncResolver)
+    _HAS_AIODNS = True
+except ImportError:
+    _HAS_AIODNS = False
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    _HTML_PARSER = 'lxml'
+except ImportError:
+    _HTML_PARSER = 'html.parser'
+
 logger = logging.getLogger(__name__)
 
+# Characters of page text kept per scraped page
+SCRAPE_TEXT_LIMIT = 5000
+
+# Bytes of a page read before the rest of the response is discarded
+SCRAPE_MAX_BYTES = 2 * 1024 * 1024
+SCRAPE_CHUNK_SIZE = 64 * 1024
+
+# aiohttp response buffer, and the largest read taken from it at once
+READ_BUFSIZE = 4 * 1024 * 1024
+SCRAPE_READ_SIZE = 1024 * 1024
+
+
+def _parse_page(html: str) -> Tuple[str, str, str]:
+    """
+    Extract the title, meta description and visible text from an HTML page
+
+    Args:
+        html: Page source
+
+    Returns:
+        (title, description, text) with text truncated to SCRAPE_TEXT_LIMIT
+    """
+    if LexborHTMLParser is not None:
+        return _parse_page_lexbor(html)
+
+    soup = BeautifulSoup(html, _HTML_PARSER)
+
+    # Extract text content
+    text = soup.get_text(separator='\n', strip=True)
+
+    # Extract title
+    title = soup.title.string if soup.title else ''
+
+    # Extract meta description
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    description = meta_desc.get('content', '') if meta_desc else ''
+
+    return title, description, text[:SCRAPE_TEXT_LIMIT]
+
+
+def _parse_page_lexbor(html: str) -> Tuple[str, str, str]:
+    """_parse_page using selectolax's lexbor parser, without building a soup tree"""
+    tree = LexborHTMLParser(html)
+
+    # Match BeautifulSoup, which leaves script and style contents out of the text
+    tree.strip_tags(['script', 'style', 'template'])
+    raw = tree.root.text(separator='\n', strip=True) if tree.root else ''
+    text = '\n'.join(line for line in raw.split('\n') if line)
+
+    title_node = tree.css_first('title')
+    title = title_node.text() if title_node else ''
+
+    meta_desc = tree.css_first('meta[name="description"]')
+    description = (meta_desc.attributes.get('content') or '') if meta_desc else ''
+
+    return title, description, text[:SCRAPE_TEXT_LIMIT]
+
 
 class WebSearcher:
     """Handles web search operations"""
@@ -26,8 +115,111 @@ class WebSearcher:
         self.engine = config.get('engine', 'duckduckgo')
         self.max_results = config.get('max_results', 10)
 
+        # Successful results keyed by (engine, query, num_results), kept for cache_ttl seconds
+        self.cache_ttl = config.get('cache_ttl', 300)
+        self.cache_size = config.get('cache_size', 256)
+        self._search_cache: Dict[Tuple[str, str, int], Tuple[float, Dict]] = {}
+
+        # Shared HTTP clients, created on first use so they bind to the running loop.
+        # HTTP/2 multiplexes concurrent requests to one host over a single connection.
+        self.http2 = config.get('http2', True) and httpx is not None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._client: Optional['httpx.AsyncClient'] = None
+
         logger.info(f"Web Searcher initialized with engine: {self.engine}")
 
+    async def __aenter__(self) -> 'WebSearcher':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it if needed"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    # Non-blocking c-ares lookups instead of the thread pool resolver
+                    resolver=aiohttp.AsyncResolver() if _HAS_AIODNS else None,
+                    limit=self.config.get('max_connections', 100),
+                    limit_per_host=self.config.get('max_connections_per_host', 20),
+                    keepalive_timeout=60,
+                    use_dns_cache=True,
+                    ttl_dns_cache=300
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.config.get('timeout', 30)),
+                read_bufsize=READ_BUFSIZE
+            )
+        return self._session
+
+    def _get_client(self) -> 'httpx.AsyncClient':
+        """Get the shared HTTP/2 client, creating it if needed"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=self.config.get('max_connections', 100),
+                    max_keepalive_connections=self.config.get('max_connections_per_host', 20),
+                    keepalive_expiry=60
+                ),
+                timeout=self.config.get('timeout', 30)
+            )
+        return self._client
+
+    async def _get_json(self, url: str, params: Dict[str, Any]) -> Any:
+        """Fetch a URL and decode its JSON body straight from the raw bytes"""
+        if self.http2:
+            response = await self._get_client().get(url, params=params)
+            return _json_loads(response.content)
+
+        session = await self._get_session()
+        async with session.get(url, params=params) as response:
+            return _json_loads(await response.read())
+
+    async def _get_text(self, url: str, timeout: float, max_bytes: int = SCRAPE_MAX_BYTES) -> str:
+        """
+        Fetch a URL, following redirects, and return its decoded body
+
+        Args:
+            url: URL to fetch
+            timeout: Total request timeout in seconds
+            max_bytes: Body bytes to read; anything beyond is never downloaded
+
+        Returns:
+            Body text, decoded with the response charset
+        """
+        buf = bytearray()
+        if self.http2:
+            client = self._get_client()
+            async with client.stream('GET', url, follow_redirects=True, timeout=timeout) as response:
+                async for chunk in response.aiter_bytes(SCRAPE_CHUNK_SIZE):
+                    buf += chunk
+                    if len(buf) >= max_bytes:
+                        break
+                encoding = response.charset_encoding
+        else:
+            session = await self._get_session()
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                # Take whatever has been buffered, in reads of up to SCRAPE_READ_SIZE
+                while len(buf) < max_bytes:
+                    chunk = await response.content.read(min(SCRAPE_READ_SIZE, max_bytes - len(buf)))
+                    if not chunk:
+                        break
+                    buf += chunk
+                encoding = response.charset
+
+        # A cut-off multibyte character at the cap is replaced rather than fatal
+        return buf[:max_bytes].decode(encoding or 'utf-8', errors='replace')
+
+    async def close(self):
+        """Close the shared HTTP clients and their pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+
     async def search(self, query: str, num_results: int = None) -> Dict[str, Any]:
         """
         Search the web for a query
@@ -40,15 +232,35 @@ class WebSearcher:
             Search results dictionary
         """
         num_results = num_results or self.max_results
+
+        key = (self.engine, query, num_results)
+        cached = self._search_cache.get(key)
+        if cached is not None:
+            if time.monotonic() - cached[0] < self.cache_ttl:
+                logger.debug(f"Search cache hit for: {query}")
+                return copy.deepcopy(cached[1])
+            del self._search_cache[key]
+
         logger.info(f"Searching for: {query} (max {num_results} results)")
 
         if self.engine == 'duckduckgo':
-            return await self._search_duckduckgo(query, num_results)
+            results = await self._search_duckduckgo(query, num_results)
         elif self.engine == 'google':
-            return await self._search_google(query, num_results)
+            results = await self._search_google(query, num_results)
         else:
             raise ValueError(f"Unsupported search engine: {self.engine}")
 
+        if 'error' not in results and self.cache_ttl > 0:
+            # Cache a private copy so callers may modify what they get back
+            self._cache_search(key, copy.deepcopy(results))
+        return results
+
+    def _cache_search(self, key: Tuple[str, str, int], results: Dict):
+        """Cache search results, evicting the oldest entry when full"""
+        if len(self._search_cache) >= self.cache_size:
+            del self._search_cache[next(iter(self._search_cache))]
+        self._search_cache[key] = (time.monotonic(), results)
+
     async def _search_duckduckgo(self, query: str, num_results: int) -> Dict:
         """Search using DuckDuckGo"""
         try:
@@ -61,9 +273,7 @@ class WebSearcher:
                 'skip_disambig': 1
             }
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    data = await response.json()
+            data = await self._get_json(url, params)
 
             results = []
 
@@ -119,9 +329,7 @@ class WebSearcher:
                 'num': min(num_results, 10)
             }
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    data = await response.json()
+            data = await self._get_json(url, params)
 
             results = []
             for item in data.get('items', []):
@@ -154,27 +362,18 @@ class WebSearcher:
             Scraped content dictionary
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=10) as response:
-                    html = await response.text()
-
-            soup = BeautifulSoup(html, 'html.parser')
-
-            # Extract text content
-            text = soup.get_text(separator='\n', strip=True)
-
-            # Extract title
-            title = soup.title.string if soup.title else ''
+            html = await self._get_text(
+                url, timeout=10, max_bytes=self.config.get('max_scrape_bytes', SCRAPE_MAX_BYTES)
+            )
 
-            # Extract meta description
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            description = meta_desc.get('content', '') if meta_desc else ''
+            # Parsing is CPU-bound; keep it off the event loop
+            title, description, text = await asyncio.to_thread(_parse_page, html)
 
             return {
                 'url': url,
                 'title': title,
                 'description': description,
-                'text': text[:5000],  # Limit text length
+                'text': text,
                 'success': True
             }
 
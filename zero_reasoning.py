@@ -3,14 +3,129 @@ Absolute Zero Reasoning Module
 First-principles reasoning from scratch without assumptions or biases
 """
 
+import asyncio
+import hashlib
 import logging
+from collections import deque
+from contextvars import ContextVar
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from itertools import combinations, islice
 import json
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 logger = logging.getLogger(__name__)
 
+# Shared prompt prefix for the reasoning pass running in the current task
+_prompt_prefix: ContextVar[Optional[str]] = ContextVar('prompt_prefix', default=None)
+
+# LLM queries a reasoner keeps in flight at once, unless llm_concurrency is set
+DEFAULT_LLM_CONCURRENCY = 8
+
+# Answers to repeatable prompts kept per reasoner, keyed by a hash of the prompt
+QUERY_CACHE_SIZE = 1024
+
+# LLMInterface.query reports provider failures as a response with this prefix
+_LLM_ERROR_PREFIX = 'Error:'
+
+# Inferences kept per reasoner
+INFERENCE_CHAIN_CAPACITY = 1024
+
+# Ways of merging the per-approach solutions into the final one
+SYNTHESIZE_MODES = ('llm', 'best', 'concat')
+
+# Component keywords and the constraint each one implies
+_CONSTRAINT_KEYWORDS = (
+    ('time', "Time flows forward (causality)"),
+    ('resource', "Resources are finite"),
+    ('compute', "Computation requires time and energy"),
+)
+
+# Prompt templates, filled in with str.format
+_DECOMPOSE_PROMPT = """Break down this problem into the most fundamental, atomic components.
+Remove all assumptions and identify only the core elements.
+
+Problem: {problem}
+
+Provide a list of atomic components (one per line):"""
+
+_RELATION_PROMPT = """Analyze if there is a fundamental logical relationship between:
+Component 1: {a}
+Component 2: {b}
+
+If a relationship exists, describe it in one sentence. If not, say "None"."""
+
+_OBJECTIVES_PROMPT = """From these fundamental components, what are the core objectives?
+
+Components: {components}
+
+List the objectives (one per line):"""
+
+_REASON_ALL_PROMPT = """Solve the problem below four independent ways:
+
+- first_principles: using only first principles and logical deduction,
+  reason step-by-step from fundamentals to solution
+- deductive: use deductive logic on the objectives and constraints to
+  deduce the necessary steps
+- inductive: based on patterns and generalizations, induce a general solution
+- abductive: determine the most likely solution that explains all observations
+
+Components: {components}
+Relationships: {relationships}
+Objectives: {objectives}
+Constraints: {constraints}
+Context: {context}
+
+Respond with only a JSON object with the string keys
+"first_principles", "deductive", "inductive" and "abductive"."""
+
+_FIRST_PRINCIPLES_PROMPT = """Using only first principles and logical deduction, solve:
+
+Components: {components}
+Relationships: {relationships}
+
+Reason step-by-step from fundamentals to solution:"""
+
+_DEDUCTIVE_PROMPT = """Use deductive logic to derive a solution:
+
+Given objectives: {objectives}
+Given constraints: {constraints}
+
+Deduce the necessary steps:"""
+
+_INDUCTIVE_PROMPT = """Based on patterns and generalizations:
+
+Understanding: {understanding}
+Context: {context}
+
+Induce a general solution:"""
+
+_ABDUCTIVE_PROMPT = """Determine the best explanation/solution:
+
+Observations: {observations}
+Context: {context}
+
+What is the most likely solution that explains all observations?"""
+
+_SYNTHESIZE_PROMPT = """Given these solutions from different reasoning approaches:
+
+{solutions}
+
+Synthesize the best overall solution that incorporates insights from all approaches:"""
+
+# Reasoning approaches applied to every problem and the weight given to each
+_APPROACH_CONFIDENCE = {
+    'first_principles': 0.8,
+    'deductive': 0.7,
+    'inductive': 0.6,
+    'abductive': 0.7
+}
+
 
 class ReasoningType(Enum):
     """Types of reasoning approaches"""
@@ -22,7 +137,7 @@ class ReasoningType(Enum):
     CAUSAL = "causal"
 
 
-@dataclass
+@dataclass(slots=True)
 class Axiom:
     """Fundamental axiom (self-evident truth)"""
     statement: str
@@ -30,7 +145,7 @@ class Axiom:
     source: str = "first_principles"
 
 
-@dataclass
+@dataclass(slots=True)
 class Inference:
     """Reasoning inference step"""
     premise: List[str]
@@ -48,8 +163,19 @@ class ZeroReasoner:
 
     def __init__(self, agent_ref):
         self.agent = agent_ref
+        config = getattr(agent_ref, 'config', {})
+        self.synthesize_mode = config.get('synthesize_mode', 'best')
+        if self.synthesize_mode not in SYNTHESIZE_MODES:
+            raise ValueError(f"Unknown synthesize_mode: {self.synthesize_mode}")
         self.axioms: List[Axiom] = self._initialize_axioms()
-        self.inference_chain: List[Inference] = []
+        self._axiom_lc: Tuple[str, ...] = tuple(a.statement.lower() for a in self.axioms)
+        self._axiom_matcher = self._build_axiom_matcher()
+        # Recent inferences only; older steps are dropped as new ones arrive
+        self.inference_chain: deque = deque(maxlen=INFERENCE_CHAIN_CAPACITY)
+        self._query_cache: Dict[str, asyncio.Future] = {}
+
+        # Gate on concurrent LLM calls so fan-outs stay within the provider's rate limit
+        self._llm_sem = asyncio.Semaphore(config.get('llm_concurrency', DEFAULT_LLM_CONCURRENCY))
 
         logger.info("Zero Reasoner initialized with first principles")
 
@@ -66,19 +192,42 @@ class ZeroReasoner:
             Axiom("Multiple solutions may exist for a single problem"),
         ]
 
-    async def reason_from_zero(self, problem: str, context: Dict) -> Dict[str, Any]:
+    def _build_axiom_matcher(self):
+        """Build an Aho-Corasick automaton over the axioms, if pyahocorasick is installed"""
+        if ahocorasick is None or not self._axiom_lc:
+            return None
+
+        automaton = ahocorasick.Automaton()
+        for i, axiom in enumerate(self._axiom_lc):
+            automaton.add_word(axiom, i)
+        automaton.make_automaton()
+        return automaton
+
+    async def reason_from_zero(self, problem: str, context: Dict,
+                               prefix: Optional[str] = None) -> Dict[str, Any]:
         """
         Reason about a problem from absolute first principles
 
         Args:
             problem: Problem statement
             context: Available context
+            prefix: Optional invariant text sent ahead of every prompt of this
+                pass, so repeated passes share a cacheable prompt prefix
 
         Returns:
             Reasoning result with solution and confidence
         """
         logger.info(f"Zero reasoning: {problem[:100]}...")
 
+        token = _prompt_prefix.set(prefix)
+        try:
+            return await self._reason(problem, context)
+        finally:
+            _prompt_prefix.reset(token)
+
+    async def _reason(self, problem: str, context: Dict) -> Dict[str, Any]:
+        """Run the reasoning steps for reason_from_zero"""
+
         # Step 1: Decompose to atomic components
         atomic_components = await self._decompose_to_atoms(problem)
 
@@ -97,27 +246,68 @@ class ZeroReasoner:
         return {
             'solution': final_solution,
             'confidence': confidence,
-            'reasoning_chain': self.inference_chain[-10:],
+            'reasoning_chain': list(islice(
+                self.inference_chain, max(0, len(self.inference_chain) - 10), None
+            )),
             'alternative_solutions': solutions,
             'axioms_used': [a.statement for a in self.axioms]
         }
 
+    async def _query(self, prompt: str) -> str:
+        """Query the LLM, sending the current prompt prefix as the system prompt"""
+        async with self._llm_sem:
+            return await self.agent.llm.query(prompt, _prompt_prefix.get())
+
+    async def _cached_query(self, prompt: str) -> str:
+        """
+        Query the LLM, reusing the answer to an identical earlier prompt
+
+        Identical prompts issued while the first is still in flight share
+        its request. Failed queries, including the "Error: ..." strings
+        LLMInterface.query returns instead of raising, are not cached.
+
+        Args:
+            prompt: Prompt to send
+
+        Returns:
+            LLM response
+        """
+        prefix = _prompt_prefix.get()
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update((prefix or '').encode())
+        digest.update(b'\0')
+        digest.update(prompt.encode())
+        key = digest.hexdigest()
+
+        future = self._query_cache.get(key)
+        if future is None:
+            if len(self._query_cache) >= QUERY_CACHE_SIZE:
+                del self._query_cache[next(iter(self._query_cache))]
+            future = asyncio.ensure_future(self._query(prompt))
+            self._query_cache[key] = future
+
+            def forget_failure(done: asyncio.Future):
+                failed = (done.cancelled() or done.exception() is not None
+                          or done.result().startswith(_LLM_ERROR_PREFIX))
+                if failed and self._query_cache.get(key) is done:
+                    del self._query_cache[key]
+
+            future.add_done_callback(forget_failure)
+
+        # Shield so one cancelled caller does not cancel the shared request
+        return await asyncio.shield(future)
+
     async def _decompose_to_atoms(self, problem: str) -> List[str]:
         """Decompose problem into atomic components"""
         logger.info("Decomposing to atomic components")
 
         # Use LLM to break down to fundamentals
-        prompt = f"""Break down this problem into the most fundamental, atomic components.
-        Remove all assumptions and identify only the core elements.
-
-        Problem: {problem}
+        prompt = _DECOMPOSE_PROMPT.format(problem=problem)
 
-        Provide a list of atomic components (one per line):"""
-
-        response = await self.agent.llm.query(prompt)
+        response = await self._query(prompt)
 
         # Parse response into components
-        components = [line.strip() for line in response.split('\n') if line.strip()]
+        components = [line for line in map(str.strip, response.splitlines()) if line]
 
         # Record inference
         self.inference_chain.append(Inference(
@@ -141,63 +331,44 @@ class ZeroReasoner:
             'objectives': []
         }
 
-        # Identify relationships between components
-        for i, comp1 in enumerate(components):
-            for comp2 in components[i+1:]:
-                relationship = await self._identify_relationship(comp1, comp2)
-                if relationship:
-                    understanding['relationships'].append(relationship)
+        # Identify relationships between every pair of components alongside the
+        # objectives query; _query bounds how many are in flight
+        *relationships, objectives = await asyncio.gather(
+            *(self._identify_relationship(comp1, comp2)
+              for i, comp1 in enumerate(components) for comp2 in components[i+1:]),
+            self._identify_objectives(components)
+        )
+        understanding['relationships'] = [r for r in relationships if r]
 
         # Identify constraints
         for component in components:
-            constraints = await self._identify_constraints(component, context)
-            understanding['constraints'].extend(constraints)
+            understanding['constraints'].extend(self._identify_constraints(component, context))
 
-        # Identify objectives
-        objectives = await self._identify_objectives(components)
         understanding['objectives'] = objectives
 
         return understanding
 
     async def _identify_relationship(self, comp1: str, comp2: str) -> Optional[str]:
         """Identify relationship between two components"""
-        prompt = f"""Analyze if there is a fundamental logical relationship between:
-        Component 1: {comp1}
-        Component 2: {comp2}
-
-        If a relationship exists, describe it in one sentence. If not, say "None"."""
+        prompt = _RELATION_PROMPT.format(a=comp1, b=comp2)
 
-        response = await self.agent.llm.query(prompt)
+        response = await self._cached_query(prompt)
 
         if response.strip().lower() != "none":
             return f"{comp1} -> {comp2}: {response}"
         return None
 
-    async def _identify_constraints(self, component: str, context: Dict) -> List[str]:
-        """Identify constraints on a component"""
-        # Basic constraint identification
-        constraints = []
-
-        # Physical/logical constraints
-        if 'time' in component.lower():
-            constraints.append("Time flows forward (causality)")
-        if 'resource' in component.lower():
-            constraints.append("Resources are finite")
-        if 'compute' in component.lower():
-            constraints.append("Computation requires time and energy")
-
-        return constraints
+    def _identify_constraints(self, component: str, context: Dict) -> List[str]:
+        """Identify physical/logical constraints on a component from its keywords"""
+        component_lc = component.lower()
+        return [constraint for keyword, constraint in _CONSTRAINT_KEYWORDS if keyword in component_lc]
 
     async def _identify_objectives(self, components: List[str]) -> List[str]:
         """Identify objectives from components"""
-        prompt = f"""From these fundamental components, what are the core objectives?
-
-        Components: {components}
+        prompt = _OBJECTIVES_PROMPT.format(components=components)
 
-        List the objectives (one per line):"""
-
-        response = await self.agent.llm.query(prompt)
-        objectives = [line.strip() for line in response.split('\n') if line.strip()]
+        response = await self._cached_query(prompt)
+        objectives = [line for line in map(str.strip, response.splitlines()) if line]
 
         return objectives
 
@@ -205,117 +376,144 @@ class ZeroReasoner:
         """Reason through multiple approaches"""
         logger.info("Applying multiple reasoning approaches")
 
-        solutions = []
-
-        # Approach 1: First Principles
-        sol1 = await self._reason_first_principles(understanding)
-        solutions.append({
-            'approach': 'first_principles',
-            'solution': sol1,
-            'confidence': 0.8
-        })
-
-        # Approach 2: Deductive
-        sol2 = await self._reason_deductive(understanding)
-        solutions.append({
-            'approach': 'deductive',
-            'solution': sol2,
-            'confidence': 0.7
-        })
-
-        # Approach 3: Inductive (from patterns)
-        sol3 = await self._reason_inductive(understanding, context)
-        solutions.append({
-            'approach': 'inductive',
-            'solution': sol3,
-            'confidence': 0.6
-        })
-
-        # Approach 4: Abductive (best explanation)
-        sol4 = await self._reason_abductive(understanding, context)
-        solutions.append({
-            'approach': 'abductive',
-            'solution': sol4,
-            'confidence': 0.7
-        })
+        answers = await self._reason_all(understanding, context)
+
+        solutions = [
+            {'approach': approach, 'solution': answers[approach], 'confidence': confidence}
+            for approach, confidence in _APPROACH_CONFIDENCE.items()
+        ]
 
         return solutions
 
+    async def _reason_all(self, understanding: Dict, context: Dict) -> Dict[str, str]:
+        """
+        Apply all four reasoning approaches in a single LLM call
+
+        Args:
+            understanding: Components, relationships, objectives and constraints
+            context: Additional context for the problem
+
+        Returns:
+            Dictionary mapping each approach name to its solution
+        """
+        prompt = _REASON_ALL_PROMPT.format(
+            components=understanding['components'],
+            relationships=understanding['relationships'],
+            objectives=understanding['objectives'],
+            constraints=understanding['constraints'],
+            context=context
+        )
+
+        response = await self._query(prompt)
+
+        try:
+            answers = json.loads(response)
+        except json.JSONDecodeError:
+            answers = None
+
+        if not isinstance(answers, dict) or not all(
+            isinstance(answers.get(approach), str) for approach in _APPROACH_CONFIDENCE
+        ):
+            # Fall back to one query per approach, still run concurrently
+            logger.warning("Batched reasoning response was not valid JSON, querying approaches separately")
+            sol1, sol2, sol3, sol4 = await asyncio.gather(
+                self._reason_first_principles(understanding),
+                self._reason_deductive(understanding),
+                self._reason_inductive(understanding, context),  # from patterns
+                self._reason_abductive(understanding, context)  # best explanation
+            )
+            return {
+                'first_principles': sol1,
+                'deductive': sol2,
+                'inductive': sol3,
+                'abductive': sol4
+            }
+
+        self._record_first_principles(understanding['components'], answers['first_principles'])
+        return answers
+
     async def _reason_first_principles(self, understanding: Dict) -> str:
         """Reason from first principles"""
         components = understanding['components']
         relationships = understanding['relationships']
 
-        prompt = f"""Using only first principles and logical deduction, solve:
-
-        Components: {components}
-        Relationships: {relationships}
+        prompt = _FIRST_PRINCIPLES_PROMPT.format(
+            components=components,
+            relationships=relationships
+        )
 
-        Reason step-by-step from fundamentals to solution:"""
-
-        solution = await self.agent.llm.query(prompt)
+        solution = await self._query(prompt)
+        self._record_first_principles(components, solution)
+        return solution
 
+    def _record_first_principles(self, components: Any, solution: str):
+        """Add a first principles conclusion to the inference chain"""
         self.inference_chain.append(Inference(
             premise=components,
             conclusion=solution,
             reasoning_type=ReasoningType.FIRST_PRINCIPLES,
-            confidence=0.8,
+            confidence=_APPROACH_CONFIDENCE['first_principles'],
             explanation="First principles reasoning"
         ))
 
-        return solution
-
     async def _reason_deductive(self, understanding: Dict) -> str:
         """Deductive reasoning"""
         objectives = understanding['objectives']
         constraints = understanding['constraints']
 
-        prompt = f"""Use deductive logic to derive a solution:
-
-        Given objectives: {objectives}
-        Given constraints: {constraints}
+        prompt = _DEDUCTIVE_PROMPT.format(objectives=objectives, constraints=constraints)
 
-        Deduce the necessary steps:"""
-
-        solution = await self.agent.llm.query(prompt)
+        solution = await self._query(prompt)
         return solution
 
     async def _reason_inductive(self, understanding: Dict, context: Dict) -> str:
         """Inductive reasoning from patterns"""
-        prompt = f"""Based on patterns and generalizations:
-
-        Understanding: {understanding}
-        Context: {context}
-
-        Induce a general solution:"""
+        prompt = _INDUCTIVE_PROMPT.format(understanding=understanding, context=context)
 
-        solution = await self.agent.llm.query(prompt)
+        solution = await self._query(prompt)
         return solution
 
     async def _reason_abductive(self, understanding: Dict, context: Dict) -> str:
         """Abductive reasoning - inference to best explanation"""
-        prompt = f"""Determine the best explanation/solution:
-
-        Observations: {understanding['components']}
-        Context: {context}
-
-        What is the most likely solution that explains all observations?"""
+        prompt = _ABDUCTIVE_PROMPT.format(
+            observations=understanding['components'],
+            context=context
+        )
 
-        solution = await self.agent.llm.query(prompt)
+        solution = await self._query(prompt)
         return solution
 
     async def _synthesize_solution(self, solutions: List[Dict]) -> str:
-        """Synthesize final solution from multiple approaches"""
-        logger.info("Synthesizing solution from multiple approaches")
+        """
+        Synthesize final solution from multiple approaches
 
-        # Use LLM to synthesize
-        prompt = f"""Given these solutions from different reasoning approaches:
+        The 'best' mode takes the highest-confidence solution and 'concat'
+        joins the unique sentences of all solutions, both without an LLM
+        call. The 'llm' mode asks the LLM to merge them.
+
+        Args:
+            solutions: Solutions from each reasoning approach
 
-        {json.dumps(solutions, indent=2)}
+        Returns:
+            Final solution
+        """
+        logger.info(f"Synthesizing solution from multiple approaches ({self.synthesize_mode})")
 
-        Synthesize the best overall solution that incorporates insights from all approaches:"""
+        if self.synthesize_mode == 'best':
+            return max(solutions, key=lambda s: s['confidence'])['solution']
 
-        final = await self.agent.llm.query(prompt)
+        if self.synthesize_mode == 'concat':
+            sentences = dict.fromkeys(
+                sentence for sentence in (
+                    part.strip() for s in solutions for part in s['solution'].split('.')
+                ) if sentence
+            )
+            return '. '.join(sentences) + '.' if sentences else ''
+
+        # Use LLM to synthesize
+        prompt = _SYNTHESIZE_PROMPT.format(solutions=json.dumps(solutions, indent=2))
+
+        final = await self._query(prompt)
         return final
 
     async def _calculate_confidence(self, final_solution: str, solutions: List[Dict]) -> float:
@@ -335,32 +533,37 @@ class ZeroReasoner:
         return min(0.99, max(0.1, confidence))
 
     def _calculate_agreement(self, solutions: List[Dict]) -> float:
-        """Calculate agreement between reasoning approaches"""
+        """Calculate agreement between reasoning approaches as mean pairwise token overlap"""
         if len(solutions) < 2:
             return 0.5
 
-        # Simple heuristic: check if solutions are similar in length and key terms
-        lengths = [len(s['solution']) for s in solutions]
-        avg_length = sum(lengths) / len(lengths)
-        variance = sum((l - avg_length) ** 2 for l in lengths) / len(lengths)
+        # Jaccard similarity of the word sets of every pair of solutions
+        token_sets = [frozenset(s['solution'].lower().split()) for s in solutions]
+        total = 0.0
+        pairs = 0
+        for a, b in combinations(token_sets, 2):
+            union = len(a | b)
+            total += len(a & b) / union if union else 1.0
+            pairs += 1
 
-        # Low variance = high agreement
-        agreement = 1.0 / (1.0 + variance / 1000)
+        agreement = total / pairs
 
         return min(0.99, agreement)
 
     async def _check_consistency(self, solution: str) -> float:
-        """Check logical consistency of solution"""
-        # Check against axioms
-        consistent_with_axioms = True
-        for axiom in self.axioms:
-            # Simple check (could be more sophisticated)
-            if axiom.statement.lower() in solution.lower():
-                pass
+        """Check logical consistency of solution against the axioms"""
+        if not self._axiom_lc:
+            return 0.5
+
+        solution_lc = solution.lower()
+        if self._axiom_matcher is not None:
+            # Single scan of the solution, counting each axiom once
+            hits = len({i for _, i in self._axiom_matcher.iter(solution_lc)})
+        else:
+            hits = sum(1 for axiom in self._axiom_lc if axiom in solution_lc)
 
-        # Placeholder consistency score
-        return 0.8 if consistent_with_axioms else 0.5
+        return 0.5 + 0.5 * hits / len(self._axiom_lc)
 
     def reset_reasoning(self):
         """Reset inference chain for new reasoning"""
-        self.inference_chain = []
+        self.inference_chain.clear()